@@ -1,6 +1,14 @@
-from pipeline_orchestrator import PipelineOrchestrator
+def __getattr__(name):
+    # Imported on first access so that importing the package stays cheap
+    if name == "PipelineOrchestrator":
+        from pipeline_orchestrator import PipelineOrchestrator
+        return PipelineOrchestrator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__init__":
+    from pipeline_orchestrator import PipelineOrchestrator
+
     # Specify the directory where input raw files are stored
     input_directory = "/path/to/input/files"
 
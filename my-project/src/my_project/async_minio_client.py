@@ -0,0 +1,257 @@
+import os
+import json
+import asyncio
+from collections import deque
+from contextlib import AsyncExitStack
+
+from aiobotocore.session import get_session
+from botocore.config import Config
+from botocore.exceptions import ClientError, BotoCoreError
+from dotenv import load_dotenv
+
+from minio_client import COMPRESSIONS, FROM_ENV, INDEX_SUFFIX, RECORDS_SUFFIX, compress_payload, decompress_payload
+
+
+class AsyncMinIOClient:
+    def __init__(self, max_concurrency=64, compression=FROM_ENV, sharded_layout=None):
+        """
+        asyncio counterpart of MinIOClient, over aiobotocore's S3 client.
+
+        One HTTP connection pool is reused for all requests, and a semaphore caps the requests in
+        flight at max_concurrency, so an ingest pipeline can issue hundreds of calls from one
+        thread without exhausting sockets. Objects are read and written in the same formats as
+        MinIOClient (Content-Encoding compression, sharded layout), so both clients interoperate.
+
+        Use as `async with AsyncMinIOClient() as client:`.
+
+        Args:
+            max_concurrency (int): Maximum concurrent requests, also the connection pool size.
+            compression (str): 'zstd' or 'gzip' for uploads. Defaults to $MINIO_COMPRESSION; None
+                turns compression off even when the variable is set.
+            sharded_layout (bool): Whether the buckets may hold sharded documents, which plain
+                uploads then delete, as in MinIOClient. Defaults to $MINIO_SHARDED_LAYOUT == 'true'.
+        """
+        load_dotenv()
+        self.max_concurrency = max_concurrency
+        if compression is FROM_ENV:
+            compression = os.getenv("MINIO_COMPRESSION")
+        self.compression = compression or None
+        if self.compression is not None and self.compression not in COMPRESSIONS:
+            raise ValueError(f"Invalid compression specified. Choose one of {COMPRESSIONS} or None.")
+        if sharded_layout is None:
+            sharded_layout = os.getenv("MINIO_SHARDED_LAYOUT", "").lower() == 'true'
+        self.sharded_layout = sharded_layout
+        secure = os.getenv("MINIO_SECURE").lower() == 'true'
+        self.endpoint_url = f"{'https' if secure else 'http'}://{os.getenv('MINIO_URL')}"
+        self._exit_stack = None
+        self._client = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        self._exit_stack = AsyncExitStack()
+        self._client = await self._exit_stack.enter_async_context(
+            get_session().create_client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                aws_access_key_id=os.getenv("MINIO_ACCESS_KEY"),
+                aws_secret_access_key=os.getenv("MINIO_SECRET_KEY"),
+                region_name=os.getenv("MINIO_REGION", "us-east-1"),
+                config=Config(
+                    max_pool_connections=self.max_concurrency,
+                    retries={"max_attempts": 5, "mode": "standard"},
+                    s3={"addressing_style": "path"},
+                ),
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+            self._exit_stack = None
+            self._client = None
+
+    async def upload_json(self, bucket_name, object_name, json_data):
+        """
+        Uploads JSON metadata to MinIO.
+
+        Returns:
+            bool: Whether the upload succeeded.
+        """
+        try:
+            await self._put_plain(bucket_name, object_name, json_data)
+            return True
+        except (ClientError, BotoCoreError) as e:
+            print(f"Error uploading JSON metadata '{object_name}': {e}")
+            return False
+
+    async def upload_many(self, bucket_name, items):
+        """
+        Upload many JSON documents concurrently, bounded by max_concurrency.
+
+        Items are consumed lazily by max_concurrency workers, so at most that many documents
+        are held at a time and a generator over a large backfill is streamed, as in
+        MinIOClient.upload_many.
+
+        Args:
+            bucket_name (str): Target bucket.
+            items (iterable): (object_name, json_data) pairs.
+
+        Returns:
+            dict: 'uploaded' object names and 'failed', object name -> error, as MinIOClient.upload_many.
+        """
+        uploaded, failed = [], {}
+        items = iter(items)
+
+        async def worker():
+            # Workers share the iterator; next() does not await, so each item is taken once
+            for object_name, json_data in items:
+                try:
+                    await self._put_plain(bucket_name, object_name, json_data)
+                    uploaded.append(object_name)
+                except (ClientError, BotoCoreError) as e:
+                    failed[object_name] = str(e)
+
+        await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
+        return {"uploaded": uploaded, "failed": failed}
+
+    async def get_metadata(self, bucket_name, object_name):
+        """
+        Download and parse one JSON document, decompressing it and reassembling the sharded
+        layout as needed.
+
+        Returns:
+            The parsed document, the raw text if the object is not valid JSON, or None if it
+            could not be retrieved or is not text.
+        """
+        try:
+            try:
+                data = await self._read_object(bucket_name, object_name)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                    raise
+                return await self._get_sharded_document(bucket_name, object_name)
+            text = data.decode('utf-8')
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                # In case the file is not valid JSON, return raw content, as MinIOClient.iter_bucket does
+                return text
+        except (ClientError, BotoCoreError, ValueError) as e:
+            print(f"Error retrieving metadata '{object_name}': {e}")
+            return None
+
+    async def list(self, bucket_name, prefix=None, start_after=None, recursive=False):
+        """
+        Async iterator over the object names of a bucket, fetched page by page.
+
+        Args:
+            recursive (bool): Also list objects under nested prefixes; by default only the top
+                level is listed, as in MinIOClient.iter_bucket.
+
+        Yields:
+            str: Object names in listing order.
+        """
+        paginator = self._client.get_paginator("list_objects_v2")
+        delimiter = {} if recursive else {"Delimiter": "/"}
+        pages = paginator.paginate(Bucket=bucket_name, Prefix=prefix or "", StartAfter=start_after or "", **delimiter)
+        async for page in pages:
+            for obj in page.get("Contents", []):
+                yield obj["Key"]
+
+    async def iter_bucket(self, bucket_name, prefix=None, start_after=None, prefetch=16, recursive=False):
+        """
+        Async iterator over (object name, parsed document) pairs in listing order, with the next
+        `prefetch` documents downloading concurrently. Sharded documents are yielded once,
+        reassembled, under their plain name, as in MinIOClient.iter_bucket.
+        """
+        in_flight = deque()
+        plain_prefixes = []  # as in MinIOClient.iter_bucket, to prefer a plain copy over a sharded one
+        try:
+            async for object_name in self.list(bucket_name, prefix=prefix, start_after=start_after, recursive=recursive):
+                if object_name.endswith(INDEX_SUFFIX):
+                    continue
+                while plain_prefixes and not object_name.startswith(plain_prefixes[-1]):
+                    plain_prefixes.pop()
+                if object_name.endswith(RECORDS_SUFFIX):
+                    object_name = object_name[:-len(RECORDS_SUFFIX)]
+                    if object_name in plain_prefixes:
+                        continue
+                else:
+                    plain_prefixes.append(object_name)
+                if len(in_flight) >= prefetch:
+                    done_name, task = in_flight.popleft()
+                    yield done_name, await task
+                in_flight.append((object_name, asyncio.ensure_future(self.get_metadata(bucket_name, object_name))))
+            while in_flight:
+                done_name, task = in_flight.popleft()
+                yield done_name, await task
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+
+    async def delete(self, bucket_name, object_name):
+        """
+        Deletes an object, or both parts of a document in the sharded layout, in one request.
+        """
+        keys = [object_name, object_name + INDEX_SUFFIX, object_name + RECORDS_SUFFIX]
+        try:
+            async with self._semaphore:
+                await self._client.delete_objects(
+                    Bucket=bucket_name, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+                )
+        except (ClientError, BotoCoreError) as e:
+            print(f"Error deleting '{object_name}' from bucket '{bucket_name}': {e}")
+
+    async def _put_plain(self, bucket_name, object_name, json_data):
+        # Remove the sharded objects of an earlier upload, as MinIOClient._put_plain
+        await self._put_json(bucket_name, object_name, json_data)
+        if not self.sharded_layout:
+            return
+        stale = [object_name + INDEX_SUFFIX, object_name + RECORDS_SUFFIX]
+        async with self._semaphore:
+            await self._client.delete_objects(
+                Bucket=bucket_name, Delete={"Objects": [{"Key": key} for key in stale], "Quiet": True}
+            )
+
+    async def _put_json(self, bucket_name, object_name, json_data):
+        extra = {"ContentEncoding": self.compression} if self.compression else {}
+        async with self._semaphore:
+            # Serialized inside the semaphore, so only max_concurrency payloads exist at a time
+            body = compress_payload(json.dumps(json_data, ensure_ascii=False).encode('utf-8'), self.compression)
+            await self._client.put_object(
+                Bucket=bucket_name, Key=object_name, Body=body, ContentType="application/json", **extra
+            )
+
+    async def _read_object(self, bucket_name, object_name):
+        async with self._semaphore:
+            response = await self._client.get_object(Bucket=bucket_name, Key=object_name)
+            async with response["Body"] as stream:
+                data = await stream.read()
+        return decompress_payload(data, response.get("ContentEncoding"))
+
+    async def _get_sharded_document(self, bucket_name, object_name):
+        index_bytes, blob = await asyncio.gather(
+            self._read_object(bucket_name, object_name + INDEX_SUFFIX),
+            self._read_object(bucket_name, object_name + RECORDS_SUFFIX),
+        )
+        index = json.loads(index_bytes.decode('utf-8'))
+        records = [
+            json.loads(decompress_payload(blob[offset:offset + length], index.get("encoding")).decode('utf-8'))
+            for _, offset, length in index["records"]
+        ]
+        return {**index["header"], index["field"]: records}
+
+
+# how to use :
+#     async def ingest(documents):
+#         async with AsyncMinIOClient(max_concurrency=128) as client:
+#             result = await client.upload_many("pdfs", documents.items())
+#             async for object_name, document in client.iter_bucket("pdfs", prefix="clean_"):
+#                 print(object_name, document["file_name"])
+#
+#     asyncio.run(ingest(documents))
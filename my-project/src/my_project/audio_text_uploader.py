@@ -1,10 +1,13 @@
 import os
 import time
-from minio_client import MinIOClient
+from minio_client import get_shared_client
+from content_dedup import ContentIndex
 
 class AudioTextUploader:
-    def __init__(self):
-        self.minio_client = MinIOClient()
+    def __init__(self, content_index=None):
+        self.minio_client = get_shared_client()
+        # Copies of an already processed transcript are not parsed again, only aliased
+        self.content_index = content_index or ContentIndex(self.minio_client)
 
     def parse_audio_transcription(self, transcription_file):
         """
@@ -42,22 +45,20 @@ class AudioTextUploader:
         
         Args:
             transcription_file (str): The path to the transcription text file.
+
+        Returns:
+            str: The ContentIndex.upload_once outcome ('uploaded', 'alias' or 'unchanged').
         """
         file_name_without_extension = os.path.basename(transcription_file).split('.')[0]
-        
-        # Parse the transcription into a structured format
-        transcription_content = self.parse_audio_transcription(transcription_file)
+        object_name = f"{file_name_without_extension}_audio.json"
 
-        # Create the metadata dictionary
-        audio_metadata = {
+        # Parse the transcription into a structured format and upload it, unless the same
+        # transcript was processed before
+        return self.content_index.upload_once(transcription_file, "audio", object_name, lambda: {
             "file_name": file_name_without_extension,
             "type": "audio",
-            "transcription": transcription_content
-        }
-
-        # Upload the JSON metadata to MinIO
-        object_name = f"{file_name_without_extension}_audio.json"
-        self.minio_client.upload_json_to_minio("audio", object_name, audio_metadata)
+            "transcription": self.parse_audio_transcription(transcription_file)
+        })
 
     def run(self, transcription_file):
         """
@@ -0,0 +1,154 @@
+import os
+import hashlib
+
+from minio.error import S3Error
+
+from embedding_cache import normalize_text
+
+
+def file_sha256(file_path, chunk_size=1 << 20):
+    """
+    SHA-256 of a file's bytes, read in chunks so large recordings are not loaded at once.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def unique_chunks(items):
+    """
+    Drop chunks whose text repeats an earlier chunk of the same document, such as a header or
+    footer printed on every page, keeping the first occurrence.
+
+    Texts are compared after normalize_text, as in the embedding cache.
+
+    Returns:
+        list: The items with distinct texts, in their original order.
+    """
+    seen = set()
+    unique = []
+    for item in items:
+        text_hash = hashlib.sha256(normalize_text(item["text"]).encode("utf-8")).digest()
+        if text_hash not in seen:
+            seen.add(text_hash)
+            unique.append(item)
+    return unique
+
+
+# User metadata key under which the SHA-256 of the source file is stored on every object
+# upload_once writes, so the index can check that an object still holds that content
+CONTENT_HASH_METADATA = "content-sha256"
+
+
+class ContentIndex:
+    def __init__(self, minio, bucket_name=None):
+        """
+        Index from the SHA-256 of source files (PDFs, images, recordings) to the metadata object
+        parsed from the first copy, stored in MinIO so every uploader process shares it.
+
+        A later copy of the same bytes under another name is not parsed again: only an alias
+        record pointing at the original object is written (see upload_once). The migrator skips
+        alias records, so the content is also embedded only once.
+
+        Args:
+            minio (MinIOClient): Client used for the index and the uploads.
+            bucket_name (str): Bucket holding the index. Defaults to $CONTENT_INDEX_BUCKET or
+                'content-index'; it is created on first use.
+        """
+        self.minio = minio
+        self.bucket_name = bucket_name or os.getenv("CONTENT_INDEX_BUCKET", "content-index")
+        self._bucket_checked = False
+
+    def lookup(self, content_hash):
+        """
+        Returns:
+            dict: The index record ({"content_hash", "bucket", "object_name", "aliases"}), or
+            None if no file with these bytes was processed.
+        """
+        try:
+            return self.minio.get_json(self.bucket_name, self._record_name(content_hash))
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchBucket"):
+                return None
+            raise
+
+    def upload_once(self, file_path, bucket_name, object_name, build_document):
+        """
+        Upload the metadata of a source file unless its bytes were processed before.
+
+        The index is only trusted after checking that the original object still holds the
+        content. If it was deleted or overwritten since, this copy is parsed, uploaded and
+        registered as the new original, and the aliases of the old one are pointed at it.
+
+        Args:
+            file_path (str): The source file.
+            bucket_name (str): Target bucket of the metadata.
+            object_name (str): Target object name of the metadata.
+            build_document (callable): Parses the file and returns the metadata to upload; only
+                called when the content is new.
+
+        Returns:
+            str: 'uploaded' for new content, 'alias' when an alias to an earlier copy was
+            written instead, 'unchanged' when this same object already holds the content, or
+            'failed' if MinIO could not be read or written.
+        """
+        content_hash = file_sha256(file_path)
+        target = {"bucket": bucket_name, "object_name": object_name}
+        try:
+            record = self.lookup(content_hash)
+            original = record and {"bucket": record["bucket"], "object_name": record["object_name"]}
+
+            if record is None or not self._holds(original, content_hash):
+                self._put(target, build_document(), content_hash)
+                aliases = [alias for alias in (record or {}).get("aliases", []) if alias != target]
+                aliases = [alias for alias in aliases if self._repoint(alias, target, content_hash)]
+                self._write_record(dict(target, content_hash=content_hash, aliases=aliases))
+                print(f"Successfully uploaded JSON metadata '{object_name}' to bucket '{bucket_name}'")
+                return "uploaded"
+
+            if target == original:
+                return "unchanged"
+
+            self._put(target, {"alias_of": original, "content_hash": content_hash}, content_hash)
+            if target not in record["aliases"]:
+                self._write_record(dict(record, aliases=record["aliases"] + [target]))
+            print(f"'{object_name}' has the same content as '{original['object_name']}'; wrote an alias")
+            return "alias"
+        except S3Error as e:
+            print(f"Error uploading '{object_name}' to bucket '{bucket_name}': {e}")
+            return "failed"
+
+    def _holds(self, location, content_hash):
+        # Missing, overwritten with other content, or written before objects carried their hash
+        metadata = self.minio.stat_metadata(location["bucket"], location["object_name"])
+        return metadata is not None and metadata.get(CONTENT_HASH_METADATA) == content_hash
+
+    def _repoint(self, alias, original, content_hash):
+        """
+        Point an alias of a replaced original at the new one. Aliases that were deleted or
+        overwritten with other content since are left alone.
+
+        Returns:
+            bool: Whether the alias is still an alias of this content.
+        """
+        if not self._holds(alias, content_hash):
+            return False
+        self._put(alias, {"alias_of": original, "content_hash": content_hash}, content_hash)
+        return True
+
+    def _put(self, location, document, content_hash):
+        self.minio.put_json(
+            location["bucket"], location["object_name"], document, metadata={CONTENT_HASH_METADATA: content_hash}
+        )
+
+    def _write_record(self, record):
+        if not self._bucket_checked:
+            self.minio.ensure_bucket(self.bucket_name)
+            self._bucket_checked = True
+        self.minio.put_json(self.bucket_name, self._record_name(record["content_hash"]), record)
+
+    @staticmethod
+    def _record_name(content_hash):
+        return f"sha256/{content_hash}.json"
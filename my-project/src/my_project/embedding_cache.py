@@ -0,0 +1,332 @@
+import os
+import re
+import json
+import time
+import atexit
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, the per-row key check still rejects foreign rows
+    fcntl = None
+
+import numpy as np
+
+
+def normalize_text(text):
+    """
+    Normalize text before hashing so that trivially different copies share a cache entry.
+
+    Applies Unicode NFC normalization (Hebrew niqqud can arrive composed or decomposed),
+    collapses runs of whitespace and strips the ends.
+    """
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by a content hash.
+
+    The memory tier is a plain LRU of recently used vectors. The disk tier is a fixed-size
+    memory-mapped float32 matrix plus a small JSON index mapping keys to rows, so it survives
+    restarts; when it is full the least recently used rows are evicted. New entries are
+    written to disk every flush_every puts or flush_interval_seconds, and on close() or exit.
+
+    Several processes may share the directory. Every row also records a digest of its key,
+    checked on read, and rows are written under a file lock, so an index that is stale (not
+    yet flushed, or overwritten by another process) can only cause a miss, never a wrong vector.
+    Evicted rows are only reused once an index without their old key is on disk.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    KEYS_FILE = "keys.npy"
+    INDEX_FILE = "index.json"
+    LOCK_FILE = "lock"
+    # Bytes of the SHA-256 of a key stored with its row
+    KEY_DIGEST_BYTES = 16
+    # Fraction of rows evicted at once when the disk tier is full, so the index is not rewritten per put
+    EVICT_FRACTION = 0.01
+
+    def __init__(self, cache_dir=None, memory_entries=10000, max_disk_bytes=1 << 30, flush_every=1000,
+                 flush_interval_seconds=30.0):
+        """
+        Args:
+            cache_dir (str): Directory of the disk tier. Defaults to $EMBEDDING_CACHE_DIR or
+                ~/.cache/my_project/embeddings. Pass an empty string to disable the disk tier.
+            memory_entries (int): Maximum number of vectors held in the memory tier.
+            max_disk_bytes (int): Size cap of the on-disk vector file.
+            flush_every (int): Number of stored vectors after which the disk index is rewritten.
+            flush_interval_seconds (float): Maximum age of unflushed entries, checked on put.
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv(
+                "EMBEDDING_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "my_project", "embeddings")
+            )
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.flush_every = flush_every
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._memory = OrderedDict()
+        self._disk_index = OrderedDict()  # key -> row, least recently used first
+        self._free_rows = []
+        self._released_rows = []  # evicted, reusable once the index without them is flushed
+        self._vectors = None
+        self._keys = None
+        self._dirty = False
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            self._load_disk_tier()
+            atexit.register(self.close)
+
+    @staticmethod
+    def make_key(model_name, max_length, text):
+        """
+        Build the cache key for a text embedded by a given model at a given max_length.
+        """
+        payload = f"{model_name}\x00{max_length}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss counters and current tier sizes.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk_index),
+        }
+
+    def get_many(self, keys):
+        """
+        Look up several keys at once.
+
+        Returns:
+            list: The cached vector for each key, or None where the key is not cached.
+        """
+        return [self.get(key) for key in keys]
+
+    def get(self, key):
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector
+
+        row = self._disk_index.get(key)
+        if row is not None:
+            with self._locked(exclusive=False):
+                valid = np.array_equal(self._keys[row], self._key_digest(key))
+                vector = np.array(self._vectors[row]) if valid else None
+            if vector is not None:
+                self._disk_index.move_to_end(key)
+                self._dirty = True
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector
+            # The row now holds another key (another process, or an eviction before a crash)
+            del self._disk_index[key]
+            self._dirty = True
+
+        self.misses += 1
+        return None
+
+    def put_many(self, keys, vectors):
+        """
+        Store vectors in both tiers. The disk index is persisted once enough entries are pending
+        (see flush_every and flush_interval_seconds).
+        """
+        for key, vector in zip(keys, vectors):
+            vector = np.asarray(vector, dtype=np.float32)
+            self._remember(key, vector)
+            if self.cache_dir:
+                self._store_on_disk(key, vector)
+                self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval_seconds:
+            self.flush()
+
+    def put(self, key, vector):
+        self.put_many([key], [vector])
+
+    def flush(self):
+        """
+        Write pending vector rows and the disk index to disk.
+        """
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        if self._vectors is None or not self._dirty:
+            return
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with self._locked(exclusive=True):
+            self._vectors.flush()
+            self._keys.flush()
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({"entries": list(self._disk_index.items())}, file)
+            os.replace(tmp_path, index_path)
+        self._dirty = False
+        # The index on disk no longer names the evicted keys, so their rows can be overwritten
+        self._free_rows.extend(self._released_rows)
+        self._released_rows = []
+
+    def close(self):
+        """
+        Persist pending entries. Also runs at interpreter exit.
+        """
+        self.flush()
+
+    def clear(self):
+        """
+        Drop every cached vector from both tiers.
+        """
+        self._memory.clear()
+        self._disk_index.clear()
+        if self._vectors is not None:
+            with self._locked(exclusive=True):
+                self._keys[:] = 0
+            self._free_rows = list(range(len(self._vectors)))
+            self._released_rows = []
+            self._dirty = True
+            self.flush()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _store_on_disk(self, key, vector):
+        if self._vectors is None:
+            self._create_disk_tier(len(vector))
+        if len(vector) != self._vectors.shape[1] or len(self._vectors) == 0:
+            return
+
+        row = self._disk_index.pop(key, None)
+        if row is None:
+            if not self._free_rows:
+                self._evict()
+            row = self._free_rows.pop()
+        with self._locked(exclusive=True):
+            self._vectors[row] = vector
+            self._keys[row] = self._key_digest(key)
+        self._disk_index[key] = row
+        self._dirty = True
+
+    def _evict(self):
+        """
+        Free the least recently used rows, and flush the index so they can be reused.
+        """
+        count = max(1, int(len(self._vectors) * self.EVICT_FRACTION))
+        for _ in range(min(count, len(self._disk_index))):
+            _, row = self._disk_index.popitem(last=False)
+            self._released_rows.append(row)
+        self._dirty = True
+        self.flush()
+
+    @contextmanager
+    def _locked(self, exclusive):
+        """
+        Hold the directory's lock file: shared for reading rows, exclusive for writing them.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.cache_dir, self.LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _key_digest(self, key):
+        return np.frombuffer(hashlib.sha256(key.encode("utf-8")).digest()[:self.KEY_DIGEST_BYTES], dtype=np.uint8)
+
+    def _create_disk_tier(self, dim):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._locked(exclusive=True):
+            # Another process sharing the directory may have created it since this one started
+            if self._open_files():
+                self._disk_index.clear()
+                self._free_rows = self._unused_rows()
+                self._released_rows = []
+                return
+            capacity = self.max_disk_bytes // (dim * np.dtype(np.float32).itemsize)
+            # Built under per-process names and moved into place, so another process never
+            # sees (or truncates) a half-created file; keys first, as loading needs both
+            keys_path = os.path.join(self.cache_dir, self.KEYS_FILE)
+            vectors_path = os.path.join(self.cache_dir, self.VECTORS_FILE)
+            self._keys = np.lib.format.open_memmap(
+                f"{keys_path}.{os.getpid()}.tmp", mode="w+", dtype=np.uint8, shape=(capacity, self.KEY_DIGEST_BYTES)
+            )
+            self._vectors = np.lib.format.open_memmap(
+                f"{vectors_path}.{os.getpid()}.tmp", mode="w+", dtype=np.float32, shape=(capacity, dim)
+            )
+            os.replace(f"{keys_path}.{os.getpid()}.tmp", keys_path)
+            os.replace(f"{vectors_path}.{os.getpid()}.tmp", vectors_path)
+        self._disk_index.clear()
+        self._free_rows = list(range(capacity - 1, -1, -1))
+        self._released_rows = []
+
+    def _open_files(self):
+        """
+        Memory-map the vector and key files if both exist.
+
+        Returns:
+            bool: Whether they were opened.
+        """
+        vectors_path = os.path.join(self.cache_dir, self.VECTORS_FILE)
+        keys_path = os.path.join(self.cache_dir, self.KEYS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(keys_path)):
+            return False
+        vectors = np.load(vectors_path, mmap_mode="r+")
+        keys = np.load(keys_path, mmap_mode="r+")
+        if len(keys) != len(vectors):
+            raise ValueError("vector and key files have different row counts")
+        self._vectors, self._keys = vectors, keys
+        return True
+
+    def _unused_rows(self):
+        # Rows never written come last, so they are handed out first; then rows of keys this
+        # index does not know (possibly live for another process, which will then miss them)
+        used = set(self._disk_index.values())
+        written = self._keys.any(axis=1)
+        rows = [row for row in range(len(self._vectors) - 1, -1, -1) if row not in used]
+        return [row for row in rows if written[row]] + [row for row in rows if not written[row]]
+
+    def _load_disk_tier(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        try:
+            if not self._open_files():
+                return
+            entries = []
+            if os.path.exists(index_path):
+                with open(index_path, "r", encoding="utf-8") as file:
+                    entries = json.load(file)["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable embedding cache at '{self.cache_dir}': {e}")
+            self._vectors = self._keys = None
+            return
+
+        capacity = len(self._vectors)
+        self._disk_index = OrderedDict((key, row) for key, row in entries if row < capacity)
+        self._free_rows = self._unused_rows()
@@ -1,14 +1,139 @@
-import torch
-from FlagEmbedding import BGEM3FlagModel
 import numpy as np
 
+from embedding_cache import normalize_text
+
+# Runtimes the model can be run on: FlagEmbedding on torch, or an int8 ONNX export
+BACKENDS = ('torch', 'onnx')
+
+# Element types get_embeddings can produce; float16 halves the memory of stored vectors
+VECTOR_DTYPES = ('float32', 'float16')
+
+# Models we know how to run, with the properties callers need before the weights are loaded
+MODEL_REGISTRY = {
+    'bgem3': {
+        'key': 'bgem3',
+        'name': 'BAAI/bge-m3',
+        'dim': 1024,
+        'max_length': 8192,
+    },
+}
+
 
 class EmbeddingModule:
-    def __init__(self, use_gpu=True):
+    def __init__(self, use_gpu=True, max_tokens_per_batch=16384, cache=None, model='bgem3',
+                 num_workers=0, threads_per_worker=1, backend='torch', intra_op_threads=None):
+        """
+        Configure the embedder. The model weights (and torch) are only loaded on first use.
+
+        Args:
+            use_gpu (bool): Run on CUDA when it is available.
+            max_tokens_per_batch (int): Token budget per forward pass for get_embeddings.
+            cache (EmbeddingCache): Optional cache consulted before running the model.
+            model (str): Key of the model in MODEL_REGISTRY.
+            num_workers (int): When above 0, embed on CPU through an EmbeddingPool of this many
+                worker processes instead of in this process.
+            threads_per_worker (int): Intra-op threads of each pool worker.
+            backend (str): 'torch' runs the FlagEmbedding model; 'onnx' runs an int8 quantized
+                ONNX export through ONNX Runtime on CPU (see onnx_backend.py).
+            intra_op_threads (int): Intra-op threads of the backend in this process. Defaults
+                to the backend's own choice.
+        """
+        if model.lower() not in MODEL_REGISTRY:
+            raise ValueError("Invalid model specified. Only 'bgem3' is currently supported.")
+        if backend not in BACKENDS:
+            raise ValueError(f"Invalid backend specified. Choose one of {BACKENDS}.")
+
+        self.use_gpu = use_gpu
+        self.model_config = MODEL_REGISTRY[model.lower()]
+        self.model_name = self.model_config['name']
+        self.embedding_dim = self.model_config['dim']
+        self.device = None
+        self._bgem3_model = None
+        self._tokenizer = None
+        self.backend = backend
+        self.intra_op_threads = intra_op_threads
+        self._onnx_backend = None
+
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+        self._pool = None
 
-        self.device = torch.device("cuda" if torch.cuda.is_available() and use_gpu else "cpu")
+        # Upper bound on (batch size * padded sequence length) for one forward pass
+        self.max_tokens_per_batch = max_tokens_per_batch
 
-        self.bgem3_model = BGEM3FlagModel('BAAI/bge-m3', use_fp16=True, device=self.device)
+        # Optional EmbeddingCache consulted before running the model
+        self.cache = cache
+
+    @property
+    def bgem3_model(self):
+        if self._bgem3_model is None:
+            self._load_model()
+        return self._bgem3_model
+
+    def _load_model(self):
+        """
+        Import torch and FlagEmbedding and load the model weights.
+        """
+        import torch
+        from FlagEmbedding import BGEM3FlagModel
+
+        if self.intra_op_threads:
+            torch.set_num_threads(self.intra_op_threads)
+        self.device = torch.device("cuda" if torch.cuda.is_available() and self.use_gpu else "cpu")
+        # fp16 only pays off on GPU; on CPU it is emulated and slower
+        self._bgem3_model = BGEM3FlagModel(self.model_name, use_fp16=self.device.type == "cuda", device=self.device)
+
+    @property
+    def onnx_backend(self):
+        if self._onnx_backend is None:
+            from onnx_backend import OnnxEmbeddingBackend
+            self._onnx_backend = OnnxEmbeddingBackend(self.model_name, num_threads=self.intra_op_threads)
+        return self._onnx_backend
+
+    def load(self):
+        """
+        Load the selected backend now instead of on the first embedding call.
+        """
+        if self.backend == 'onnx':
+            self.onnx_backend.session
+        else:
+            self.bgem3_model
+
+    @property
+    def tokenizer(self):
+        """
+        The model tokenizer. Loaded on its own when the model itself is not needed in this process.
+        """
+        if self._bgem3_model is not None:
+            return self._bgem3_model.tokenizer
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            from embedding_pool import EmbeddingPool
+            self._pool = EmbeddingPool(
+                num_workers=self.num_workers,
+                threads_per_worker=self.threads_per_worker,
+                model=self.model_config['key'],
+                dim=self.embedding_dim,
+                max_tokens_per_batch=self.max_tokens_per_batch,
+                backend=self.backend,
+            )
+        return self._pool
+
+    def close(self):
+        """
+        Shut down the worker pool, if one was started, and persist the embedding cache.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self.cache is not None:
+            self.cache.close()
 
     def get_embedding(self, text, model='bgem3'):
         """
@@ -24,13 +149,214 @@ class EmbeddingModule:
         Raises:
             ValueError: If an unsupported model is specified.
         """
-        if model.lower() == 'bgem3':
-            return self.bgem3_model.encode([text], batch_size=1, max_length=8192)['dense_vecs'][0]
-        else:
+        return self.get_embeddings([text], model=model)[0]
+
+    def get_embeddings(self, texts, model='bgem3', max_length=None, max_tokens_per_batch=None, dtype='float32'):
+        """
+        Generate embeddings for a list of texts in length-bucketed batches.
+
+        Texts are sorted by token length and grouped so that each batch only pads up to
+        its own longest member, and the batch size is chosen so that batch size times the
+        padded length stays within the token budget. When a cache is configured, only the
+        texts it does not already hold are sent to the model.
+
+        Args:
+            texts (list[str]): The input texts to embed.
+            model (str): The model to use for embedding. Currently, only 'bgem3' is supported.
+            max_length (int): Maximum number of tokens per text; longer texts are truncated.
+                Defaults to the model's registry entry.
+            max_tokens_per_batch (int): Token budget per forward pass. Defaults to the value
+                given to the constructor.
+            dtype (str): Element type of the result, one of VECTOR_DTYPES. Each batch is written
+                straight into a matrix of this type, so no full-size float32 copy is made.
+
+        Returns:
+            numpy.ndarray: A matrix of shape (len(texts), dim) and type dtype, in the order of `texts`.
+
+        Raises:
+            ValueError: If an unsupported model or dtype is specified.
+        """
+        if model.lower() != 'bgem3':
             raise ValueError("Invalid model specified. Only 'bgem3' is currently supported.")
+        if np.dtype(dtype).name not in VECTOR_DTYPES:
+            raise ValueError(f"Invalid dtype specified. Choose one of {VECTOR_DTYPES}.")
+        dtype = np.dtype(dtype)
+
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=dtype)
+
+        # Identical texts, such as boilerplate repeated across documents, are embedded once
+        first_index = {}
+        inverse = [first_index.setdefault(normalize_text(text), i) for i, text in enumerate(texts)]
+        if len(first_index) < len(texts):
+            unique_positions = list(first_index.values())
+            unique = self.get_embeddings(
+                [texts[i] for i in unique_positions], model=model, max_length=max_length,
+                max_tokens_per_batch=max_tokens_per_batch, dtype=dtype
+            )
+            row_of = {position: row for row, position in enumerate(unique_positions)}
+            return unique[[row_of[i] for i in inverse]]
+
+        max_length = max_length or self.model_config['max_length']
+        budget = max_tokens_per_batch or self.max_tokens_per_batch
+
+        if self.cache is None:
+            return self._embed_texts(texts, max_length, budget, dtype=dtype)
+
+        # Quantized backends produce slightly different vectors, so they get their own entries
+        cache_model_name = self.model_name if self.backend == 'torch' else f"{self.model_name}:{self.backend}"
+        keys = [self.cache.make_key(cache_model_name, max_length, text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=dtype)
+        for i, vector in enumerate(cached):
+            if vector is not None:
+                embeddings[i] = vector
+        if missing:
+            # The cache keeps float32, so only the misses are computed at full precision
+            computed = self._embed_texts([texts[i] for i in missing], max_length, budget)
+            self.cache.put_many([keys[i] for i in missing], computed)
+            embeddings[missing] = computed
+
+        return embeddings
+
+    def get_multi_embeddings(self, texts, max_length=None, max_tokens_per_batch=None, return_colbert=True):
+        """
+        Generate dense, sparse (lexical) and multi-vector (ColBERT) representations in one pass.
+
+        Uses the same length-bucketed batching as get_embeddings. Runs the torch model in this
+        process; the cache and the worker pool only hold dense vectors and are not used.
+
+        Args:
+            texts (list[str]): The input texts to embed.
+            max_length (int): Maximum number of tokens per text. Defaults to the model's registry entry.
+            max_tokens_per_batch (int): Token budget per forward pass. Defaults to the constructor value.
+            return_colbert (bool): Also return the per-token ColBERT vectors.
+
+        Returns:
+            dict: 'dense' (float32 matrix), 'sparse' (list of {token_id: weight} dicts) and
+            'colbert' (list of float32 matrices, or None), all in the order of `texts`.
+
+        Raises:
+            ValueError: If the backend cannot produce sparse and ColBERT outputs.
+        """
+        if self.backend != 'torch':
+            raise ValueError("Sparse and ColBERT outputs are only available with the 'torch' backend.")
+
+        texts = list(texts)
+        max_length = max_length or self.model_config['max_length']
+        budget = max_tokens_per_batch or self.max_tokens_per_batch
+
+        dense = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        sparse = [None] * len(texts)
+        colbert = [None] * len(texts) if return_colbert else None
+        if not texts:
+            return {'dense': dense, 'sparse': sparse, 'colbert': colbert}
+
+        lengths = self.count_tokens(texts, max_length=max_length)
+        for indices, padded_length in self._make_batches(lengths, budget):
+            output = self.bgem3_model.encode(
+                [texts[i] for i in indices],
+                batch_size=len(indices),
+                max_length=padded_length,
+                return_dense=True,
+                return_sparse=True,
+                return_colbert_vecs=return_colbert,
+            )
+            dense[indices] = output['dense_vecs']
+            for position, i in enumerate(indices):
+                # FlagEmbedding keys lexical weights by the token id as a string
+                sparse[i] = {int(token_id): float(weight) for token_id, weight in output['lexical_weights'][position].items()}
+                if return_colbert:
+                    colbert[i] = np.asarray(output['colbert_vecs'][position], dtype=np.float32)
+
+        return {'dense': dense, 'sparse': sparse, 'colbert': colbert}
+
+    def _embed_texts(self, texts, max_length, budget, dtype=np.float32):
+        """
+        Embed texts with the model, batching them by token length, into a matrix of type dtype.
+        """
+        if self.num_workers:
+            return self.pool.encode(texts, max_length=max_length, dtype=dtype)
+
+        lengths = self.count_tokens(texts, max_length=max_length)
+
+        embeddings = None
+        for indices, padded_length in self._make_batches(lengths, budget):
+            batch = [texts[i] for i in indices]
+            vectors = self._encode_batch(batch, padded_length)
+            if embeddings is None:
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype=dtype)
+            embeddings[indices] = vectors
+
+        return embeddings
+
+    def count_tokens(self, texts, max_length=8192, add_special_tokens=True):
+        """
+        Count the tokens of each text as the model tokenizer sees them.
+
+        Args:
+            texts (list[str]): The input texts.
+            max_length (int): Counts are capped at this length, matching encode-time truncation.
+                Pass None to count without truncation.
+            add_special_tokens (bool): Include the special tokens added around each input.
+
+        Returns:
+            list[int]: The token count of each text.
+        """
+        encoded = self.tokenizer(
+            list(texts),
+            add_special_tokens=add_special_tokens,
+            truncation=max_length is not None,
+            max_length=max_length,
+        )
+        return [len(ids) for ids in encoded['input_ids']]
+
+    @staticmethod
+    def _make_batches(lengths, max_tokens_per_batch):
+        """
+        Group text indices into batches of similar token length.
+
+        Args:
+            lengths (list[int]): The token count of each text.
+            max_tokens_per_batch (int): Upper bound on batch size times padded length.
+
+        Returns:
+            list[tuple]: (indices, padded_length) pairs, where indices is a numpy array of
+            positions in the original input and padded_length is the longest text in the batch.
+        """
+        order = np.argsort(lengths, kind='stable')[::-1]
+        batches = []
+        start = 0
+        while start < len(order):
+            # Longest text first, so the first member fixes the padded length of the batch
+            padded_length = max(int(lengths[order[start]]), 1)
+            batch_size = max(1, max_tokens_per_batch // padded_length)
+            indices = order[start:start + batch_size]
+            batches.append((indices, padded_length))
+            start += batch_size
+        return batches
+
+    def _encode_batch(self, texts, max_length):
+        """
+        Run one forward pass over a batch and return its dense vectors in the backend's own
+        precision; the caller casts them into its output matrix.
+        """
+        if self.backend == 'onnx':
+            return self.onnx_backend.encode(texts, max_length=max_length)
+        output = self.bgem3_model.encode(texts, batch_size=len(texts), max_length=max_length)
+        return np.asarray(output['dense_vecs'])
 
 if __name__ == "__main__":
     embedder = EmbeddingModule()
     test_text = "This is a test sentence."
     bgem3_embedding = embedder.get_embedding(test_text, model='bgem3')
-    print("BGEM3 embedding shape:", bgem3_embedding.shape)
\ No newline at end of file
+    print("BGEM3 embedding shape:", bgem3_embedding.shape)
+
+    test_texts = ["Call me Ishmael.", "זהו משפט בדיקה.", test_text * 20]
+    bgem3_embeddings = embedder.get_embeddings(test_texts)
+    print("BGEM3 batch embedding shape:", bgem3_embeddings.shape, bgem3_embeddings.dtype)
+    half_embeddings = embedder.get_embeddings(test_texts, dtype='float16')
+    print("BGEM3 float16 embeddings:", half_embeddings.dtype, f"{half_embeddings.nbytes} bytes")
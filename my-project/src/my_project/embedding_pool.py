@@ -0,0 +1,166 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Model held by each worker process, created by _init_worker
+_worker_embedder = None
+
+
+def _init_worker(model, num_threads, max_tokens_per_batch, backend):
+    """
+    Load the model once per worker, with intra-op threading capped to num_threads.
+    """
+    global _worker_embedder
+    # Must be set before torch is imported in this process
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    os.environ["MKL_NUM_THREADS"] = str(num_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    from embedding_module import EmbeddingModule
+
+    _worker_embedder = EmbeddingModule(
+        use_gpu=False, max_tokens_per_batch=max_tokens_per_batch, model=model,
+        backend=backend, intra_op_threads=num_threads
+    )
+    _worker_embedder.load()
+
+
+def _encode_into_shared_memory(shm_name, shape, dtype, indices, texts, max_length):
+    """
+    Embed texts and write their vectors into rows `indices` of the shared result matrix.
+    """
+    # Spawned workers share the parent's resource tracker, so attaching here does not
+    # take ownership of the segment; the parent unlinks it
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        result = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        result[indices] = _worker_embedder._embed_texts(
+            texts, max_length, _worker_embedder.max_tokens_per_batch, dtype=dtype
+        )
+        del result
+    finally:
+        shm.close()
+    return len(texts)
+
+
+class EmbeddingPool:
+    def __init__(self, num_workers=None, threads_per_worker=1, model='bgem3', dim=1024,
+                 max_tokens_per_batch=16384, texts_per_task=128, backend='torch'):
+        """
+        Pool of CPU worker processes, each holding its own copy of the embedding model.
+
+        Vectors are written by the workers straight into a shared-memory matrix, so only
+        the input texts are pickled.
+
+        Args:
+            num_workers (int): Number of worker processes. Defaults to cores // threads_per_worker.
+            threads_per_worker (int): Intra-op (torch/OpenMP) threads per worker.
+            model (str): Key of the model in MODEL_REGISTRY.
+            dim (int): Embedding dimension of the model.
+            max_tokens_per_batch (int): Token budget per forward pass inside each worker.
+            texts_per_task (int): Number of texts sent to a worker at a time.
+            backend (str): EmbeddingModule backend the workers run.
+        """
+        if num_workers is None:
+            num_workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+        self.num_workers = num_workers
+        self.dim = dim
+        self.texts_per_task = texts_per_task
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model, threads_per_worker, max_tokens_per_batch, backend),
+        )
+
+    def encode(self, texts, max_length=8192, dtype=np.float32):
+        """
+        Embed texts across all workers.
+
+        Texts are ordered by length before being split into tasks, so each worker gets
+        inputs of similar size and pads little.
+
+        Returns:
+            numpy.ndarray: A matrix of type dtype and shape (len(texts), dim), in the order of `texts`.
+        """
+        texts = list(texts)
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        tasks = [order[start:start + self.texts_per_task] for start in range(0, len(order), self.texts_per_task)]
+        return next(self._run(texts, tasks, max_length, ordered_output=False, dtype=dtype))
+
+    def imap(self, texts, max_length=8192, chunk_size=None, dtype=np.float32):
+        """
+        Embed texts across all workers and yield the results in input order, one chunk at a time.
+
+        Args:
+            texts (list[str]): The input texts.
+            max_length (int): Maximum number of tokens per text.
+            chunk_size (int): Number of rows per yielded matrix. Defaults to texts_per_task.
+            dtype: Element type of the yielded matrices.
+
+        Yields:
+            numpy.ndarray: Consecutive matrices covering `texts` in order.
+        """
+        texts = list(texts)
+        chunk_size = chunk_size or self.texts_per_task
+        tasks = [np.arange(start, min(start + chunk_size, len(texts))) for start in range(0, len(texts), chunk_size)]
+        yield from self._run(texts, tasks, max_length, ordered_output=True, dtype=dtype)
+
+    def _run(self, texts, tasks, max_length, ordered_output, dtype=np.float32):
+        shape = (len(texts), self.dim)
+        dtype = np.dtype(dtype)
+        if not texts:
+            yield np.empty(shape, dtype=dtype)
+            return
+
+        # Workers write in the requested type, so a float16 result uses half the shared memory
+        shm = shared_memory.SharedMemory(create=True, size=len(texts) * self.dim * dtype.itemsize)
+        result = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        futures = []
+        try:
+            futures = [
+                self._executor.submit(
+                    _encode_into_shared_memory, shm.name, shape, dtype.str, indices, [texts[i] for i in indices],
+                    max_length
+                )
+                for indices in tasks
+            ]
+            if ordered_output:
+                # Tasks cover consecutive rows, so each chunk can be handed out as soon as it lands
+                for indices, future in zip(tasks, futures):
+                    future.result()
+                    yield result[indices[0]:indices[-1] + 1].copy()
+            else:
+                for future in futures:
+                    future.result()
+                yield result.copy()
+        finally:
+            for future in futures:
+                future.cancel()
+            # The segment cannot be closed while a numpy view still points into it
+            del result
+            shm.close()
+            shm.unlink()
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# how to use :
+#     with EmbeddingPool(num_workers=8, threads_per_worker=4) as pool:
+#         vectors = pool.encode(texts)
+#         for vectors_chunk in pool.imap(texts, chunk_size=512):
+#             ...
+
+# or through EmbeddingModule, which MilvusDB.insert and FileVectorMigrator use:
+#     embedder = EmbeddingModule(num_workers=8, threads_per_worker=4, cache=EmbeddingCache())
+#     milvus = MilvusDB(embedder=embedder)
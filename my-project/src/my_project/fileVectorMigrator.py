@@ -1,17 +1,27 @@
-from minio_client import MinIOClient
-from milvus_module import MilvusClient
+from minio.error import S3Error
+from minio_client import get_shared_client
+from milvus_module import MilvusDB
+from embedding_module import EmbeddingModule
+from embedding_cache import EmbeddingCache
+from text_chunker import TextChunker
+from content_dedup import unique_chunks
 
 
 class FileVectorMigrator:
-    def __init__(self, minio, milvus):
+    def __init__(self, minio, milvus, chunker=None, batch_size=1000):
         """
         minio: instance of MinIO client.
         milvus: instance of Milvus client.
+        chunker: TextChunker used to split documents before embedding. Defaults to one
+                 built on the Milvus client's embedder.
+        batch_size: number of chunks, across documents, embedded and upserted together.
         """
         self.minio = minio
         self.milvus = milvus
-        # Defining collections and corresponding MinIO buckets directly in the code
-        self.collections = {
+        self.chunker = chunker or TextChunker(milvus.embedder)
+        self.batch_size = batch_size
+        # MinIO buckets to migrate; the target Milvus collection follows from each document's shape
+        self.buckets = {
             "pdfs",
             "audio",
             "images",
@@ -19,44 +29,65 @@ class FileVectorMigrator:
         }
 
     def migrate(self):
-        # List to hold data to be inserted into Milvus
-        data_to_insert = []
+        for bucket_name in self.buckets:
+            print(f"Starting migration for bucket '{bucket_name}'")
 
-        for collection in self.collections:
+            # Chunk every document so each vector covers a bounded window of text, and replace
+            # only that document's vectors so re-running the migration does not duplicate rows.
+            # Objects are streamed, so the next ones download while earlier ones are embedded, and
+            # chunks of several documents are embedded and upserted together in batch_size groups.
+            counts = {"inserted": 0, "failed": 0}
+            pending = {}
+            pending_chunks = 0
+            aliases = []
+            try:
+                for object_name, document in self.minio.iter_bucket(bucket_name):
+                    if not isinstance(document, dict):
+                        print(f"Skipping object '{object_name}': not a parsed JSON document")
+                        continue
+                    if "alias_of" in document:
+                        # Same bytes as another object, which is embedded under its own name; drop
+                        # vectors embedded before this object became an alias, batch_size names
+                        # per delete request
+                        aliases.append(object_name)
+                        if len(aliases) >= self.batch_size:
+                            self.milvus.delete_file(aliases)
+                            aliases = []
+                        continue
+                    # Boilerplate repeated across pages or segments is embedded and stored once
+                    pending[object_name] = unique_chunks(self.chunker.chunk_document(document, file_name=object_name))
+                    pending_chunks += len(pending[object_name])
+                    if pending_chunks >= self.batch_size:
+                        self._upsert(pending, counts)
+                        pending, pending_chunks = {}, 0
+            except S3Error as e:
+                print(f"Stopped reading bucket '{bucket_name}': {e}")
+            if pending:
+                self._upsert(pending, counts)
+            if aliases:
+                self.milvus.delete_file(aliases)
 
+            print(f"Inserted {counts['inserted']} chunks from bucket '{bucket_name}', {counts['failed']} failed")
 
-
-
-        # Loop through the collections (buckets and corresponding Milvus collections)
-        for bucket_name, milvus_collection in self.collections.items():
-            print(f"Starting migration for bucket '{bucket_name}' and collection '{milvus_collection}'")
-
-            # Iterate over the objects in the MinIO bucket using the client
-            objects = self.minio.client.list_objects(bucket_name, recursive=True)
-            for obj in objects:
-                # get the object from MinIO
-                output = self.minio.get_metadata_from_minio(bucket_name, obj.object_name, bucket_name, page_number=None, start_time=None)
-                #TODO Implement the logic to extract text from audio, image, and video files
-                text = output['content']
-                # Collect the data to be inserted into Milvus
-                data_to_insert.append({
-                    'type': milvus_collection,
-                    'file': obj.object_name,
-                    'text': text
-                })
-
-        # Insert the collected data into Milvus
-        self.milvus.insert(data_to_insert)
-
+        # One flush for the whole migration; Milvus rate-limits flushes
+        self.milvus.flush()
         print("Migration completed for all collections!")
 
+    def _upsert(self, files, counts):
+        summary = self.milvus.upsert_files(files, batch_size=self.batch_size, flush=False)
+        counts["inserted"] += sum(summary['counts'].values())
+        counts["failed"] += len(summary['failed'])
+
 
 # Example usage
 if __name__ == "__main__":
     # Create instances of MinIO and Milvus clients
-    minio_client = MinIOClient()
-    milvus_client = MilvusClient()
+    minio_client = get_shared_client()
+    # On CPU-only nodes, spread embedding over worker processes (here 8 workers x 4 threads)
+    embedder = EmbeddingModule(cache=EmbeddingCache(), num_workers=8, threads_per_worker=4)
+    milvus_client = MilvusDB(embedder=embedder)
 
     # Create and run the migration
     migrator = FileVectorMigrator(minio_client, milvus_client)
     migrator.migrate()
+    embedder.close()
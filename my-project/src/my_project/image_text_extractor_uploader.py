@@ -2,11 +2,14 @@ import os
 import time
 from PIL import Image
 import pytesseract
-from minio_client import MinIOClient
+from minio_client import get_shared_client
+from content_dedup import ContentIndex
 
 class ImageTextExtractorUploader:
-    def __init__(self):
-        self.minio_client = MinIOClient()
+    def __init__(self, content_index=None):
+        self.minio_client = get_shared_client()
+        # Copies of an already processed image are not OCRed again, only aliased
+        self.content_index = content_index or ContentIndex(self.minio_client)
 
     def extract_text_from_image(self, image_path, lang='heb', tess_cmd=r'C:\Program Files\Tesseract-OCR\tesseract.exe'):
         pytesseract.pytesseract.tesseract_cmd = tess_cmd
@@ -17,14 +20,12 @@ class ImageTextExtractorUploader:
     def upload_image_metadata(self, image_path):
         file_name_without_extension = os.path.basename(image_path).split('.')[0]
         file_extension = os.path.basename(image_path).split('.')[1]
-        extracted_text = self.extract_text_from_image(image_path)
-        image_metadata = {
+        object_name = f"{file_name_without_extension}_{file_extension}.json"
+        return self.content_index.upload_once(image_path, "images", object_name, lambda: {
             "file_name": file_name_without_extension,
             "type": file_extension,
-            "content": extracted_text
-        }
-        object_name = f"{file_name_without_extension}_{file_extension}.json"
-        self.minio_client.upload_json_to_minio("images", object_name, image_metadata)
+            "content": self.extract_text_from_image(image_path)
+        })
 
     def run(self, image_path):
         start_time = time.time()
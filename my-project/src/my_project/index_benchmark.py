@@ -0,0 +1,140 @@
+import time
+
+import numpy as np
+from pymilvus import connections, Collection, CollectionSchema, FieldSchema, DataType
+from pymilvus.orm import utility
+
+from index_config import choose_index, search_params_for
+
+
+def make_corpus(num_rows, num_queries, dim=1024, num_clusters=256, seed=0):
+    """
+    Build a reproducible synthetic corpus of unit vectors drawn around random cluster centres,
+    which is closer to real embeddings than uniform noise.
+
+    Returns:
+        tuple: (corpus, queries) float32 matrices.
+    """
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((num_clusters, dim)).astype(np.float32)
+
+    def sample(count):
+        points = centres[rng.integers(0, num_clusters, count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+        return points / np.linalg.norm(points, axis=1, keepdims=True)
+
+    return sample(num_rows), sample(num_queries)
+
+
+def exact_top_k(corpus, queries, top_k, chunk_size=4096):
+    """
+    Exact L2 nearest neighbours by brute force, in chunks of the corpus.
+
+    Returns:
+        numpy.ndarray: (len(queries), top_k) row ids of the true neighbours.
+    """
+    best_distances = np.full((len(queries), 0), np.inf, dtype=np.float32)
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    query_norms = np.sum(queries ** 2, axis=1, keepdims=True)
+
+    for start in range(0, len(corpus), chunk_size):
+        chunk = corpus[start:start + chunk_size]
+        distances = query_norms - 2 * queries @ chunk.T + np.sum(chunk ** 2, axis=1)
+        ids = np.broadcast_to(np.arange(start, start + len(chunk)), distances.shape)
+        best_distances = np.concatenate([best_distances, distances], axis=1)
+        best_ids = np.concatenate([best_ids, ids], axis=1)
+        keep = np.argsort(best_distances, axis=1)[:, :top_k]
+        best_distances = np.take_along_axis(best_distances, keep, axis=1)
+        best_ids = np.take_along_axis(best_ids, keep, axis=1)
+
+    return best_ids
+
+
+def benchmark_index(index_params, corpus, queries, truth, top_k=10, latency_target_ms=None,
+                    collection_name="index_benchmark", insert_batch_size=5000, vector_dtype="float32"):
+    """
+    Build one index over the corpus in a scratch collection and measure it.
+
+    Queries are sent one at a time, as the RAG front end does. With vector_dtype='float16' the
+    collection stores FLOAT16_VECTOR embeddings and queries are sent as float16 too.
+
+    Returns:
+        dict: index params, search params, recall@k against exact search, and p50/p99 latency in ms.
+    """
+    if utility.has_collection(collection_name):
+        utility.drop_collection(collection_name)
+
+    fields = [
+        FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
+        FieldSchema(
+            name="embedding",
+            dtype=DataType.FLOAT16_VECTOR if np.dtype(vector_dtype) == np.float16 else DataType.FLOAT_VECTOR,
+            dim=corpus.shape[1]
+        ),
+    ]
+    collection = Collection(name=collection_name, schema=CollectionSchema(fields, "index benchmark"))
+
+    def rows(vectors):
+        # pymilvus takes FLOAT16_VECTOR rows as float16 arrays and FLOAT_VECTOR rows as lists
+        if np.dtype(vector_dtype) == np.float16:
+            return list(vectors.astype(np.float16))
+        return vectors.tolist()
+
+    try:
+        for start in range(0, len(corpus), insert_batch_size):
+            batch = corpus[start:start + insert_batch_size]
+            collection.insert([list(range(start, start + len(batch))), rows(batch)])
+        collection.flush()
+
+        build_start = time.time()
+        collection.create_index(field_name="embedding", index_params=index_params)
+        utility.wait_for_index_building_complete(collection_name)
+        build_seconds = time.time() - build_start
+        collection.load()
+
+        search_params = search_params_for(index_params, top_k=top_k, latency_target_ms=latency_target_ms)
+        latencies = []
+        recalls = []
+        for query, true_ids in zip(queries, truth):
+            start_time = time.perf_counter()
+            results = collection.search(data=rows(query[None, :]), anns_field="embedding", param=search_params, limit=top_k)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+            recalls.append(len(set(results[0].ids) & set(true_ids.tolist())) / top_k)
+
+        return {
+            "vector_dtype": np.dtype(vector_dtype).name,
+            "index_params": index_params,
+            "search_params": search_params,
+            "build_seconds": build_seconds,
+            f"recall@{top_k}": float(np.mean(recalls)),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+        }
+    finally:
+        collection.release()
+        utility.drop_collection(collection_name)
+
+
+if __name__ == "__main__":
+    num_rows, num_queries, dim, top_k = 100_000, 500, 1024, 10
+
+    connections.connect("default", host="localhost", port="19530")
+    corpus, queries = make_corpus(num_rows, num_queries, dim=dim)
+    truth = exact_top_k(corpus, queries, top_k)
+
+    candidates = [
+        {"metric_type": "L2", "index_type": "FLAT", "params": {}},
+        {"metric_type": "L2", "index_type": "IVF_FLAT", "params": {"nlist": 1024}},
+        {"metric_type": "L2", "index_type": "IVF_SQ8", "params": {"nlist": 1024}},
+        {"metric_type": "L2", "index_type": "IVF_PQ", "params": {"nlist": 1024, "m": dim // 16, "nbits": 8}},
+        {"metric_type": "L2", "index_type": "HNSW", "params": {"M": 16, "efConstruction": 200}},
+        choose_index(num_rows, dim=dim),
+    ]
+
+    print(f"{num_rows} vectors, dim {dim}, {num_queries} queries, top {top_k}")
+    for index_params in candidates:
+        result = benchmark_index(index_params, corpus, queries, truth, top_k=top_k)
+        print(f"{index_params['index_type']:<9} {index_params['params']} search={result['search_params']['params']} "
+              f"recall@{top_k}={result[f'recall@{top_k}']:.3f} p50={result['p50_ms']:.2f}ms "
+              f"p99={result['p99_ms']:.2f}ms build={result['build_seconds']:.1f}s")
+
+    connections.disconnect("default")
@@ -0,0 +1,87 @@
+import math
+
+# Collection sizes at which the index type changes
+FLAT_MAX_ROWS = 20_000
+HNSW_MAX_ROWS = 2_000_000
+IVF_SQ8_MAX_ROWS = 20_000_000
+
+# Latency targets (ms) at or below which search parameters favour speed over recall
+TIGHT_LATENCY_MS = 10
+
+
+def choose_index(num_rows, dim=1024, latency_target_ms=None, metric_type="L2", quantize=False):
+    """
+    Pick an index type and build parameters for a collection of a given size.
+
+    - Up to FLAT_MAX_ROWS: FLAT. Exact search is already fast and needs no training.
+    - Up to HNSW_MAX_ROWS: HNSW, which gives the best recall/latency while it fits in memory.
+    - Up to IVF_SQ8_MAX_ROWS: IVF_SQ8, a quarter of the memory of float32 vectors.
+    - Beyond that: IVF_PQ, compressing each vector to dim/16 bytes.
+
+    With quantize=True, collections past FLAT_MAX_ROWS get IVF_SQ8 instead of HNSW: each vector
+    component is stored as one byte, trading a little recall for a quarter of the memory.
+
+    IVF nlist grows with the square root of the row count (about 4 * sqrt(n)).
+
+    Args:
+        num_rows (int): Expected or current number of vectors.
+        dim (int): Vector dimension.
+        latency_target_ms (float): Desired per-query latency; tighter targets get cheaper search params.
+        metric_type (str): Milvus metric type.
+        quantize (bool): Prefer the int8 scalar-quantized IVF_SQ8 index over HNSW.
+
+    Returns:
+        dict: Milvus index params, as passed to Collection.create_index.
+    """
+    if num_rows <= FLAT_MAX_ROWS:
+        return {"metric_type": metric_type, "index_type": "FLAT", "params": {}}
+
+    if num_rows <= HNSW_MAX_ROWS and not quantize:
+        tight = latency_target_ms is not None and latency_target_ms <= TIGHT_LATENCY_MS
+        return {
+            "metric_type": metric_type,
+            "index_type": "HNSW",
+            "params": {"M": 16 if tight else 32, "efConstruction": 200},
+        }
+
+    nlist = _nlist_for(num_rows)
+    if num_rows <= IVF_SQ8_MAX_ROWS:
+        return {"metric_type": metric_type, "index_type": "IVF_SQ8", "params": {"nlist": nlist}}
+
+    # PQ needs the number of sub-quantizers to divide the dimension
+    m = next(m for m in range(max(1, dim // 16), 0, -1) if dim % m == 0)
+    return {"metric_type": metric_type, "index_type": "IVF_PQ", "params": {"nlist": nlist, "m": m, "nbits": 8}}
+
+
+def search_params_for(index_params, top_k=10, latency_target_ms=None):
+    """
+    Derive search parameters for an index built with the given index params.
+
+    Args:
+        index_params (dict): The index params (metric_type, index_type, params).
+        top_k (int): Number of results the search asks for.
+        latency_target_ms (float): Desired per-query latency.
+
+    Returns:
+        dict: Milvus search params, as passed to Collection.search(param=...).
+    """
+    tight = latency_target_ms is not None and latency_target_ms <= TIGHT_LATENCY_MS
+    index_type = index_params.get("index_type", "FLAT")
+    params = index_params.get("params", {})
+
+    if index_type == "HNSW":
+        # ef must be at least the number of results requested
+        search = {"ef": max(top_k, 64 if tight else 128)}
+    elif index_type.startswith("IVF"):
+        nlist = int(params.get("nlist", 1024))
+        search = {"nprobe": max(4 if tight else 8, nlist // (128 if tight else 64))}
+    else:
+        search = {}
+
+    return {"metric_type": index_params.get("metric_type", "L2"), "params": search}
+
+
+def _nlist_for(num_rows):
+    # Roughly 4 * sqrt(n), rounded to a power of two and kept within Milvus' limits
+    nlist = 2 ** round(math.log2(4 * math.sqrt(num_rows)))
+    return int(min(max(nlist, 128), 65536))
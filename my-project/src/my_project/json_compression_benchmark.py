@@ -0,0 +1,109 @@
+import os
+import glob
+import json
+import time
+
+import numpy as np
+
+from minio_client import MinIOClient, COMPRESSIONS, compress_payload, decompress_payload
+from pdf_text_extractor_uploader import PDFTextExtractorUploader
+from image_text_extractor_uploader import ImageTextExtractorUploader
+from audio_text_uploader import AudioTextUploader
+
+
+def build_documents(examples_dir):
+    """
+    Parse the POC examples into the JSON documents the uploaders store.
+
+    Returns:
+        dict: Object name -> document, for every PDF, image and transcribed audio file in examples_dir.
+    """
+    documents = {}
+    pdf_uploader = PDFTextExtractorUploader()
+    for path in sorted(glob.glob(os.path.join(examples_dir, "*.pdf"))):
+        name = os.path.basename(path)[:-4]
+        documents[f"{name}_pdf.json"] = {"file_name": name, "type": "pdf", "pages": pdf_uploader.extract_text_from_pdf(path)}
+
+    image_uploader = ImageTextExtractorUploader()
+    for path in sorted(glob.glob(os.path.join(examples_dir, "*.png"))):
+        name = os.path.basename(path).split('.')[0]
+        documents[f"{name}_png.json"] = {"file_name": name, "type": "png", "content": image_uploader.extract_text_from_image(path)}
+
+    # Transcripts are made outside this package; an audio file is only benchmarked once its
+    # '<name>_transcript.txt' has been placed next to it
+    audio_uploader = AudioTextUploader()
+    for path in sorted(glob.glob(os.path.join(examples_dir, "*.mp3"))):
+        name = os.path.basename(path).split('.')[0]
+        transcript_path = os.path.join(examples_dir, f"{name}_transcript.txt")
+        if not os.path.exists(transcript_path):
+            print(f"Skipping '{os.path.basename(path)}': no transcript at '{transcript_path}'")
+            continue
+        documents[f"{name}_audio.json"] = {
+            "file_name": name, "type": "audio", "transcription": audio_uploader.parse_audio_transcription(transcript_path)
+        }
+    return documents
+
+
+def measure_compression(documents, compression):
+    """
+    Stored size and in-process compress/decompress time of every document.
+
+    Returns:
+        dict: 'raw_bytes', 'stored_bytes', 'compress_ms' and 'decompress_ms' totals.
+    """
+    totals = {"raw_bytes": 0, "stored_bytes": 0, "compress_ms": 0.0, "decompress_ms": 0.0}
+    for document in documents.values():
+        raw = json.dumps(document, ensure_ascii=False).encode('utf-8')
+        start_time = time.perf_counter()
+        stored = compress_payload(raw, compression)
+        totals["compress_ms"] += (time.perf_counter() - start_time) * 1000
+        start_time = time.perf_counter()
+        decompress_payload(stored, compression)
+        totals["decompress_ms"] += (time.perf_counter() - start_time) * 1000
+        totals["raw_bytes"] += len(raw)
+        totals["stored_bytes"] += len(stored)
+    return totals
+
+
+def measure_read_latency(client, bucket_name, documents, repeats=20):
+    """
+    Upload the documents with the client's compression and time full reads (GET, decompress,
+    parse) with get_json. The client should have no cache, or repeats are served locally.
+
+    Returns:
+        dict: p50 and p99 read latency in ms over all documents and repeats.
+    """
+    for object_name, document in documents.items():
+        client.put_json(bucket_name, object_name, document)
+
+    latencies = []
+    for _ in range(repeats):
+        for object_name in documents:
+            start_time = time.perf_counter()
+            client.get_json(bucket_name, object_name)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+
+    for object_name in documents:
+        client.delete_file_in_bucket(bucket_name, object_name)
+    return {"p50_ms": float(np.percentile(latencies, 50)), "p99_ms": float(np.percentile(latencies, 99))}
+
+
+if __name__ == "__main__":
+    examples_dir = "../../../POC_Examples"
+    bucket_name = "compression-benchmark"
+
+    documents = build_documents(examples_dir)
+    print(f"{len(documents)} documents from {examples_dir}")
+
+    for compression in (None,) + COMPRESSIONS:
+        client = MinIOClient(compression=compression, sharded_layout=False)
+        # Time the GETs themselves, even when $MINIO_OBJECT_CACHE is set
+        client.cache = None
+        client.ensure_bucket(bucket_name)
+
+        sizes = measure_compression(documents, compression)
+        latency = measure_read_latency(client, bucket_name, documents)
+        saved = 1 - sizes["stored_bytes"] / sizes["raw_bytes"]
+        print(f"{compression or 'none':<5} stored={sizes['stored_bytes'] / 1024:9.1f} KB ({saved:6.1%} saved) "
+              f"compress={sizes['compress_ms']:7.1f}ms decompress={sizes['decompress_ms']:6.1f}ms "
+              f"read p50={latency['p50_ms']:.2f}ms p99={latency['p99_ms']:.2f}ms")
@@ -0,0 +1,587 @@
+import os
+import json
+import time
+import heapq
+import shutil
+from typing import List, Dict, Any
+
+import numpy as np
+
+from embedding_module import EmbeddingModule
+from embedding_cache import EmbeddingCache
+from search_filters import SCALAR_DEFAULTS, scalar_fields, filter_mask
+from primary_keys import item_primary_key
+
+
+class _Segment:
+    """
+    One append-only batch of rows: a memory-mapped vector matrix plus a JSON-lines file of
+    row attributes, loaded into column arrays for filtering. Deleted rows stay in the files and
+    are masked out by `alive` until the collection is compacted.
+    """
+
+    def __init__(self, directory, segment_id, deleted=()):
+        self.segment_id = segment_id
+        base = os.path.join(directory, segment_id)
+        self.vectors = np.load(base + ".npy", mmap_mode="r")
+        with open(base + ".jsonl", "r", encoding="utf-8") as file:
+            self.rows = [json.loads(line) for line in file]
+
+        self.columns = {"file": np.array([row["file"] for row in self.rows], dtype=object)}
+        for field in SCALAR_DEFAULTS:
+            self.columns[field] = np.array([row[field] for row in self.rows])
+        self.ids = np.array([row.get("id", -1) for row in self.rows], dtype=np.int64)
+        self.norms = _squared_norms(self.vectors)
+        self.alive = np.ones(len(self.rows), dtype=bool)
+        self.alive[list(deleted)] = False
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class LocalVectorStore:
+    def __init__(self, root_dir: str = None, embedder: EmbeddingModule = None, vector_dtype: str = "float32"):
+        """
+        Embedded vector store with the MilvusDB interface, for tests, demos and single-box
+        deployments that should not need a Milvus server.
+
+        Each collection is a directory of append-only segments (float32 or float16 .npy files,
+        opened memory-mapped) and a manifest, which also records deleted rows until compaction. Search is exact, with a vectorized L2 scan, unless
+        build_ivf has been run, in which case an IVF coarse quantizer limits the scan to the
+        nprobe nearest lists.
+
+        Args:
+            root_dir: Where collections are stored. Defaults to $LOCAL_VECTOR_STORE_DIR or
+                      ~/.cache/my_project/vector_store.
+            embedder: The EmbeddingModule to use. Defaults to one with an EmbeddingCache.
+            vector_dtype: 'float32' or 'float16' storage for vectors.
+        """
+        if root_dir is None:
+            root_dir = os.getenv(
+                "LOCAL_VECTOR_STORE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "my_project", "vector_store")
+            )
+        self.root_dir = root_dir
+        self.connect()
+        self.vector_dtype = np.dtype(vector_dtype)
+        self.collections = {
+            "document": "rag_document_collection",
+            "audio": "rag_audio_collection",
+            "image": "rag_image_collection",
+        }
+
+        self.embedder = embedder or EmbeddingModule(cache=EmbeddingCache())
+        self.embedding_dim = self.embedder.embedding_dim
+
+        # Open segments and IVF indexes per collection, loaded on first use
+        self._segments = {}
+        self._ivf = {}
+
+        # Duration of the most recent search call, for latency measurements
+        self.last_search_ms = None
+
+    def connect(self):
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def disconnect(self):
+        self.release()
+
+    def create_collection(self, name: str, expected_rows: int = 0, latency_target_ms: float = None):
+        """
+        Create an empty collection, or open it if it already exists. expected_rows and
+        latency_target_ms are accepted for MilvusDB compatibility; call build_ivf once the
+        collection is large enough to benefit from it.
+        """
+        directory = self._collection_dir(name)
+        if not os.path.exists(os.path.join(directory, "manifest.json")):
+            os.makedirs(directory, exist_ok=True)
+            self._write_manifest(name, {"segments": [], "next_segment": 0, "dim": self.embedding_dim})
+        return self._open(name)
+
+    def list_collections(self):
+        if not os.path.isdir(self.root_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root_dir)
+            if os.path.exists(os.path.join(self.root_dir, name, "manifest.json"))
+        )
+
+    def remove_all_collections(self):
+        for name in self.list_collections():
+            shutil.rmtree(self._collection_dir(name))
+        self._segments.clear()
+        self._ivf.clear()
+
+    def warm_up(self, names: List[str] = None, refresh: bool = False):
+        for name in names or self.collections.values():
+            if refresh:
+                self._segments.pop(name, None)
+                self._ivf.pop(name, None)
+            if self._exists(name):
+                self._open(name)
+
+    def release(self, names: List[str] = None):
+        for name in list(names or self._segments):
+            self._segments.pop(name, None)
+            self._ivf.pop(name, None)
+
+    def insert(self, data: List[Dict[str, Any]], batch_size: int = 1000) -> Dict[str, Any]:
+        return self.bulk_insert(data, batch_size=batch_size)
+
+    def bulk_insert(self, data: List[Dict[str, Any]], batch_size: int = 1000, upsert: bool = False,
+                    flush: bool = True) -> Dict[str, Any]:
+        """
+        Embed items and append them to their collections, one new segment per collection.
+
+        upsert and flush are accepted for MilvusDB compatibility: use upsert_file(s) to replace
+        rows, and segments are persisted as they are written.
+
+        Returns:
+            dict: 'counts' per type and 'failed' rows, as MilvusDB.bulk_insert.
+        """
+        counts = {}
+        failed = []
+
+        groups = {}
+        for item in data:
+            if item.get('type') not in self.collections:
+                failed.append({"item": item, "error": f"Unknown type {item.get('type')!r}"})
+            elif not item.get('text'):
+                failed.append({"item": item, "error": "Missing text"})
+            elif not item.get('file'):
+                failed.append({"item": item, "error": "Missing file"})
+            else:
+                groups.setdefault(item['type'], []).append(item)
+
+        for item_type, items in groups.items():
+            name = self.collections[item_type]
+            if not self._exists(name):
+                self.create_collection(name)
+
+            vectors = np.empty((len(items), self.embedding_dim), dtype=self.vector_dtype)
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                vectors[start:start + len(batch)] = self.embedder.get_embeddings(
+                    [item['text'] for item in batch], dtype=self.vector_dtype.name
+                )
+
+            self.add_vectors(name, vectors, items)
+            counts[item_type] = len(items)
+
+        return {"counts": counts, "failed": failed}
+
+    def add_vectors(self, name: str, vectors: np.ndarray, items: List[Dict[str, Any]]):
+        """
+        Append already embedded rows to a collection as a new segment.
+
+        Args:
+            name: Collection name.
+            vectors: (len(items), dim) matrix.
+            items: The items the vectors belong to, with 'file' and optional position fields.
+        """
+        if len(vectors) != len(items):
+            raise ValueError(f"Got {len(vectors)} vectors for {len(items)} items.")
+        if vectors.shape[1] != self.embedding_dim:
+            raise ValueError(f"Embedding dimension mismatch. Expected {self.embedding_dim}, got {vectors.shape[1]}")
+        if not len(items):
+            return
+
+        rows = []
+        for item in items:
+            row = {
+                "id": item_primary_key(item),
+                "file": item['file'],
+                # Extract metadata (all fields except 'type', 'file', and 'text')
+                "metadata": {k: v for k, v in item.items() if k not in ['type', 'file', 'text']},
+                "text": item.get('text'),
+            }
+            row.update(scalar_fields(item))
+            rows.append(row)
+
+        manifest = self._read_manifest(name)
+        segment_id = self._write_segment(name, manifest, vectors, rows)
+        manifest["segments"].append(segment_id)
+        self._write_manifest(name, manifest)
+
+        if name in self._segments:
+            self._segments[name].append(_Segment(self._collection_dir(name), segment_id))
+
+    def upsert_file(self, file: str, items: List[Dict[str, Any]], batch_size: int = 1000,
+                    flush: bool = True) -> Dict[str, Any]:
+        """
+        Replace the rows of one file with `items`, as MilvusDB.upsert_file.
+
+        Returns:
+            dict: The bulk_insert summary.
+        """
+        return self.upsert_files({file: items}, batch_size=batch_size)
+
+    def upsert_files(self, files: Dict[str, List[Dict[str, Any]]], batch_size: int = 1000,
+                     flush: bool = True) -> Dict[str, Any]:
+        """
+        Replace the rows of several files, as MilvusDB.upsert_files; their new rows are written
+        as one segment per collection.
+
+        Returns:
+            dict: The bulk_insert summary.
+        """
+        for file in files:
+            self.delete_file(file)
+        items = [dict(item, file=file) for file, file_items in files.items() for item in file_items]
+        return self.bulk_insert(items, batch_size=batch_size)
+
+    def delete_file(self, file):
+        """
+        Mark every row of a file, or of a list of files, as deleted in all collections. The rows
+        are dropped from disk by the next compact.
+        """
+        for name in self.collections.values():
+            if not self._exists(name):
+                continue
+            manifest = self._read_manifest(name)
+            deleted = manifest.setdefault("deleted", {})
+            changed = False
+            for segment in self._open(name):
+                rows = np.flatnonzero(segment.alive & filter_mask(segment.columns, file=file))
+                if len(rows):
+                    segment.alive[rows] = False
+                    deleted[segment.segment_id] = sorted(set(deleted.get(segment.segment_id, [])) | set(rows.tolist()))
+                    changed = True
+            if changed:
+                self._write_manifest(name, manifest)
+
+    def flush(self, names: List[str] = None):
+        """
+        Nothing to do: segments and the manifest are written by every insert and delete.
+        """
+
+    def compact(self, name: str):
+        """
+        Merge all segments of a collection into one, dropping deleted rows. The IVF index, if any,
+        is dropped because it refers to the old segments; call build_ivf again afterwards.
+        """
+        manifest = self._read_manifest(name)
+        segments = self._open(name)
+        if len(segments) <= 1 and not manifest.get("deleted"):
+            return
+
+        directory = self._collection_dir(name)
+        total = sum(int(segment.alive.sum()) for segment in segments)
+        segment_id = f"seg_{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+
+        merged = np.lib.format.open_memmap(
+            os.path.join(directory, segment_id + ".npy"), mode="w+", dtype=self.vector_dtype,
+            shape=(total, self.embedding_dim)
+        )
+        offset = 0
+        with open(os.path.join(directory, segment_id + ".jsonl"), "w", encoding="utf-8") as file:
+            for segment in segments:
+                rows = np.flatnonzero(segment.alive)
+                merged[offset:offset + len(rows)] = segment.vectors[rows]
+                offset += len(rows)
+                for row in rows:
+                    file.write(json.dumps(segment.rows[row], ensure_ascii=False) + "\n")
+        merged.flush()
+        del merged
+
+        old_ids = manifest["segments"]
+        manifest["segments"] = [segment_id]
+        manifest.pop("ivf", None)
+        manifest.pop("deleted", None)
+        self._write_manifest(name, manifest)
+
+        self.release([name])
+        for old_id in old_ids:
+            for extension in (".npy", ".jsonl"):
+                os.remove(os.path.join(directory, old_id + extension))
+        ivf_path = os.path.join(directory, "ivf.npz")
+        if os.path.exists(ivf_path):
+            os.remove(ivf_path)
+
+    def build_ivf(self, name: str, nlist: int = None, iterations: int = 10, sample_size: int = 100_000, seed: int = 0):
+        """
+        Compact a collection and build an IVF coarse quantizer over it with k-means.
+
+        Segments appended afterwards are still searched exhaustively until build_ivf is run again.
+
+        Args:
+            name: Collection name.
+            nlist: Number of lists. Defaults to about 4 * sqrt(rows).
+            iterations: k-means iterations.
+            sample_size: Number of rows the centroids are trained on.
+            seed: Random seed for sampling and initialisation.
+        """
+        self.compact(name)
+        segments = self._open(name)
+        if not segments or not len(segments[0]):
+            return
+        segment = segments[0]
+        vectors = segment.vectors
+        nlist = min(nlist or max(1, int(4 * np.sqrt(len(segment)))), len(segment))
+
+        rng = np.random.default_rng(seed)
+        sample = vectors[np.sort(rng.choice(len(segment), min(sample_size, len(segment)), replace=False))]
+        centroids = _kmeans(np.asarray(sample, dtype=np.float32), nlist, iterations, rng)
+
+        assignments = _nearest_centroids(vectors, centroids, 1)[:, 0]
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))])
+
+        np.savez(os.path.join(self._collection_dir(name), "ivf.npz"), centroids=centroids, order=order, offsets=offsets)
+        manifest = self._read_manifest(name)
+        manifest["ivf"] = {"segment": segment.segment_id, "nlist": nlist}
+        self._write_manifest(name, manifest)
+        self._ivf[name] = {"segment": segment.segment_id, "centroids": centroids, "order": order, "offsets": offsets}
+
+    def similarity_search(self, query_text: str, top_k: int = 5, timeout: float = None,
+                          filters: Dict[str, Any] = None, expr: str = None, modalities: List[str] = None,
+                          nprobe: int = 16):
+        """
+        Search all collections and merge their hits by distance, as MilvusDB.similarity_search.
+
+        timeout is accepted for compatibility. Raw expr strings are not supported; use filters.
+        nprobe is the number of IVF lists scanned in collections that have an IVF index.
+        """
+        return self.batch_similarity_search(
+            [query_text], top_k=top_k, timeout=timeout, filters=filters, expr=expr, modalities=modalities, nprobe=nprobe
+        )[0]
+
+    def batch_similarity_search(self, queries: List[str], top_k: int = 5, timeout: float = None,
+                                filters: Dict[str, Any] = None, expr: str = None, modalities: List[str] = None,
+                                nprobe: int = 16) -> List[List[Dict[str, Any]]]:
+        """
+        Search many queries at once with one matrix product per segment.
+
+        Returns:
+            list: One ranked result list per query, in the order of `queries`.
+        """
+        if expr:
+            raise ValueError("LocalVectorStore does not evaluate raw expressions; pass filters instead.")
+        if not queries:
+            return []
+        query_embeddings = self.embedder.get_embeddings(queries, model='bgem3')
+        return self.search_vectors(query_embeddings, top_k=top_k, filters=filters, modalities=modalities, nprobe=nprobe)
+
+    def search_vectors(self, query_embeddings: np.ndarray, top_k: int = 5, filters: Dict[str, Any] = None,
+                       modalities: List[str] = None, nprobe: int = 16) -> List[List[Dict[str, Any]]]:
+        """
+        Search with already embedded queries. Distances are squared L2, like Milvus' L2 metric.
+        """
+        start_time = time.perf_counter()
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        query_norms = np.sum(queries ** 2, axis=1)
+        names = [self.collections[modality] for modality in modalities] if modalities else list(self.collections.values())
+
+        candidates = [[] for _ in range(len(queries))]
+        for name in names:
+            if not self._exists(name):
+                continue
+            segments = self._open(name)
+            ivf = self._ivf.get(name)
+            for segment in segments:
+                if not len(segment):
+                    continue
+                mask = filter_mask(segment.columns, **filters) if filters else None
+                if not segment.alive.all():
+                    mask = segment.alive if mask is None else mask & segment.alive
+                if ivf is not None and ivf["segment"] == segment.segment_id:
+                    hits = _ivf_top_k(segment, ivf, queries, top_k, mask, nprobe)
+                else:
+                    hits = _exact_top_k(segment, queries, top_k, mask)
+                for i, (rows, distances) in enumerate(hits):
+                    candidates[i].extend((distance, name, segment, row) for row, distance in zip(rows, distances))
+
+        results = []
+        for i, query_candidates in enumerate(candidates):
+            best = heapq.nsmallest(top_k, query_candidates, key=lambda candidate: candidate[0])
+            results.append([
+                {
+                    "collection": name,
+                    "file": segment.rows[row]["file"],
+                    "metadata": segment.rows[row]["metadata"],
+                    "text": segment.rows[row].get("text"),
+                    "distance": float(distance + query_norms[i]),
+                }
+                for distance, name, segment, row in best
+            ])
+
+        self.last_search_ms = (time.perf_counter() - start_time) * 1000
+        return results
+
+    def _collection_dir(self, name):
+        return os.path.join(self.root_dir, name)
+
+    def _exists(self, name):
+        return os.path.exists(os.path.join(self._collection_dir(name), "manifest.json"))
+
+    def _read_manifest(self, name):
+        with open(os.path.join(self._collection_dir(name), "manifest.json"), "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _write_manifest(self, name, manifest):
+        path = os.path.join(self._collection_dir(name), "manifest.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(manifest, file)
+        os.replace(path + ".tmp", path)
+
+    def _write_segment(self, name, manifest, vectors, rows):
+        directory = self._collection_dir(name)
+        segment_id = f"seg_{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+        np.save(os.path.join(directory, segment_id + ".npy"), np.asarray(vectors, dtype=self.vector_dtype))
+        with open(os.path.join(directory, segment_id + ".jsonl"), "w", encoding="utf-8") as file:
+            for row in rows:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return segment_id
+
+    def _open(self, name):
+        """
+        Segments of a collection, memory-mapping them on first use.
+        """
+        if name not in self._segments:
+            manifest = self._read_manifest(name)
+            directory = self._collection_dir(name)
+            deleted = manifest.get("deleted", {})
+            self._segments[name] = [
+                _Segment(directory, segment_id, deleted.get(segment_id, ())) for segment_id in manifest["segments"]
+            ]
+            ivf_path = os.path.join(directory, "ivf.npz")
+            if manifest.get("ivf") and os.path.exists(ivf_path):
+                with np.load(ivf_path) as ivf:
+                    self._ivf[name] = {"segment": manifest["ivf"]["segment"], **{key: ivf[key] for key in ivf.files}}
+        return self._segments[name]
+
+
+def _squared_norms(vectors, chunk_size=65536):
+    norms = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        norms[start:start + len(chunk)] = np.einsum("ij,ij->i", chunk, chunk)
+    return norms
+
+
+def _partial_distances(queries, vectors, norms):
+    # ||x||^2 - 2 q.x: the squared L2 distance without the per-query ||q||^2 term, which
+    # does not change the ranking and is added back to the final results
+    return norms[None, :] - 2 * (queries @ np.asarray(vectors, dtype=np.float32).T)
+
+
+def _select_top_k(distances, top_k):
+    """
+    Indices and values of the top_k smallest entries of each row, in ascending order.
+    """
+    k = min(top_k, distances.shape[1])
+    if k == 0:
+        return np.empty((len(distances), 0), dtype=np.int64), np.empty((len(distances), 0), dtype=np.float32)
+    part = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(distances, part, axis=1)
+    order = np.argsort(values, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def _exact_top_k(segment, queries, top_k, mask, chunk_size=65536):
+    """
+    Exhaustive scan of a segment in chunks of rows, keeping a running top_k per query.
+
+    Returns:
+        list: (row ids, partial distances) per query.
+    """
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    best_distances = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, len(segment), chunk_size):
+        stop = min(start + chunk_size, len(segment))
+        distances = _partial_distances(queries, segment.vectors[start:stop], segment.norms[start:stop])
+        if mask is not None:
+            distances[:, ~mask[start:stop]] = np.inf
+        rows, values = _select_top_k(distances, top_k)
+        best_rows = np.concatenate([best_rows, rows + start], axis=1)
+        best_distances = np.concatenate([best_distances, values], axis=1)
+        keep, best_distances = _select_top_k(best_distances, top_k)
+        best_rows = np.take_along_axis(best_rows, keep, axis=1)
+    return [_drop_filtered(rows, distances) for rows, distances in zip(best_rows, best_distances)]
+
+
+def _ivf_top_k(segment, ivf, queries, top_k, mask, nprobe):
+    """
+    Scan only the rows of the nprobe lists whose centroids are closest to each query.
+    """
+    nearest_lists = _nearest_centroids(queries, ivf["centroids"], nprobe)
+    order, offsets = ivf["order"], ivf["offsets"]
+    hits = []
+    for query, lists in zip(queries, nearest_lists):
+        rows = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in lists]))
+        if mask is not None:
+            rows = rows[mask[rows]]
+        if not len(rows):
+            hits.append((rows, np.empty(0, dtype=np.float32)))
+            continue
+        distances = _partial_distances(query[None, :], segment.vectors[rows], segment.norms[rows])
+        keep, values = _select_top_k(distances, top_k)
+        hits.append((rows[keep[0]], values[0]))
+    return hits
+
+
+def _drop_filtered(rows, distances):
+    finite = np.isfinite(distances)
+    return rows[finite], distances[finite]
+
+
+def _nearest_centroids(vectors, centroids, count, chunk_size=65536):
+    """
+    The `count` closest centroids of each vector, closest first.
+    """
+    centroid_norms = np.sum(centroids ** 2, axis=1)
+    nearest = np.empty((len(vectors), min(count, len(centroids))), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        nearest[start:start + len(chunk)] = _select_top_k(centroid_norms[None, :] - 2 * chunk @ centroids.T, count)[0]
+    return nearest
+
+
+def _kmeans(data, k, iterations, rng):
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroids(data, centroids, 1)[:, 0]
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        counts = np.bincount(assignments, minlength=k)
+        # Empty lists keep their previous centroid
+        nonempty = counts > 0
+        centroids[nonempty] = sums[nonempty] / counts[nonempty, None]
+    return centroids
+
+
+if __name__ == "__main__":
+    # Measure exact and IVF search latency and IVF recall on a synthetic corpus; no model needed
+    num_rows, num_queries, dim, top_k = 200_000, 200, 1024, 10
+    rng = np.random.default_rng(0)
+    centres = rng.standard_normal((256, dim)).astype(np.float32)
+    corpus = centres[rng.integers(0, 256, num_rows)] + 0.5 * rng.standard_normal((num_rows, dim)).astype(np.float32)
+    queries = centres[rng.integers(0, 256, num_queries)] + 0.5 * rng.standard_normal((num_queries, dim)).astype(np.float32)
+
+    store = LocalVectorStore(root_dir="local_vector_store_benchmark", embedder=EmbeddingModule())
+    store.remove_all_collections()
+    name = store.collections["document"]
+    store.create_collection(name)
+    for start in range(0, num_rows, 50_000):
+        batch = corpus[start:start + 50_000]
+        store.add_vectors(name, batch, [{"file": "synthetic", "line": start + i} for i in range(len(batch))])
+
+    def run(label, **kwargs):
+        latencies, found = [], []
+        for query in queries:
+            found.append(store.search_vectors(query[None, :], top_k=top_k, **kwargs)[0])
+            latencies.append(store.last_search_ms)
+        print(f"{label}: p50={np.percentile(latencies, 50):.2f}ms p99={np.percentile(latencies, 99):.2f}ms")
+        return [{hit["metadata"]["line"] for hit in hits} for hits in found]
+
+    exact = run(f"exact, {num_rows} rows in 4 segments")
+    store.compact(name)
+    run("exact, compacted")
+    store.build_ivf(name)
+    for nprobe in (8, 32):
+        approximate = run(f"ivf nprobe={nprobe}", nprobe=nprobe)
+        recall = np.mean([len(a & e) / top_k for a, e in zip(approximate, exact)])
+        print(f"  recall@{top_k}={recall:.3f}")
+
+    store.remove_all_collections()
@@ -1,15 +1,54 @@
 import os
+import json
+import time
+import heapq
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import List, Dict, Any
-from pymilvus import connections, Collection, CollectionSchema, FieldSchema, DataType
+
+import numpy as np
+from pymilvus import connections, Collection, CollectionSchema, FieldSchema, DataType, AnnSearchRequest, RRFRanker
 from pymilvus.orm import utility
-from tqdm import tqdm
+from pymilvus.exceptions import MilvusException
 
 from embedding_module import EmbeddingModule
+from embedding_cache import EmbeddingCache
+from index_config import choose_index, search_params_for
+from search_filters import SCALAR_DEFAULTS, scalar_fields, build_filter_expr, combine_exprs
+from text_chunker import TEXT_MAX_BYTES, truncate_utf8
+from primary_keys import item_primary_key
+from query_cache import QueryCache
 
 class MilvusDB:
-    def __init__(self, host: str = "localhost", port: str = "19530"):
+    # Rows per page when reading back the ids of a file to find stale ones
+    DELETE_SCAN_BATCH = 1000
+
+    def __init__(self, host: str = "localhost", port: str = "19530", embedder: EmbeddingModule = None,
+                 hybrid: bool = False, search_timeout: float = 10.0, latency_target_ms: float = None,
+                 num_partitions: int = 64, query_cache: QueryCache = None, vector_dtype: str = "float32",
+                 quantize_index: bool = False, recheck_seconds: float = 30.0):
+        """
+        hybrid: also store BGE-M3 sparse (lexical) vectors, computed in the same forward pass as
+                the dense ones, so that hybrid_search can be used. Requires the 'torch' backend, and
+                insert then bypasses the embedding cache and worker pool, which hold dense vectors only.
+        search_timeout: seconds each collection gets to answer a search before it is left out.
+        latency_target_ms: desired per-query latency, used when choosing index and search params.
+        num_partitions: number of partitions new collections hash the 'file' partition key into.
+        query_cache: cache of search results, invalidated per collection by every write through
+                     this instance. Defaults to a QueryCache(); set self.query_cache = None to disable.
+        vector_dtype: 'float32' stores FLOAT_VECTOR embeddings; 'float16' stores FLOAT16_VECTOR ones,
+                      halving vector memory. Must match the schema of existing collections.
+        quantize_index: index larger collections with the int8 scalar-quantized IVF_SQ8 instead of
+                        HNSW (see index_config.choose_index).
+        recheck_seconds: how often searches look again at collections that were missing or empty,
+                         e.g. when the service started before ingestion.
+        """
         self.host = host
         self.port = port
+        self.hybrid = hybrid
+        self.num_partitions = num_partitions
+        self.vector_dtype = np.dtype(vector_dtype)
+        self.quantize_index = quantize_index
         self.connect()
         self.collections = {
             "document": "rag_document_collection",
@@ -17,7 +56,24 @@ class MilvusDB:
             "image": "rag_image_collection",
         }
 
-        self.embedder = EmbeddingModule()
+        self.embedder = embedder or EmbeddingModule(cache=EmbeddingCache())
+        self.query_cache = query_cache or QueryCache()
+
+        # Collection handles by name, reused across calls
+        self._collection_handles = {}
+        # Collections loaded into query node memory by this process, and their row counts
+        self._loaded = set()
+        self._row_counts = {}
+        # When missing or empty collections were last checked, so searches re-check them on a TTL
+        self.recheck_seconds = recheck_seconds
+        self._checked_at = {}
+        # Vector index params per collection, as created or as read back from Milvus
+        self.latency_target_ms = latency_target_ms
+        self._index_params = {}
+
+        # Per-collection searches run concurrently on this pool
+        self.search_timeout = search_timeout
+        self._search_executor = ThreadPoolExecutor(max_workers=len(self.collections), thread_name_prefix="milvus-search")
 
         self.embedding_dim = self.get_embedding_dim()
 
@@ -25,85 +81,626 @@ class MilvusDB:
         connections.connect("default", host=self.host, port=self.port)
 
     def disconnect(self):
+        self._search_executor.shutdown(wait=False, cancel_futures=True)
         connections.disconnect("default")
 
     def get_embedding_dim(self) -> int:
-        sample_text = "This is a sample text to get embedding dimension."
-        embedding = self.embedder.get_embedding(sample_text, model='bgem3')
-        return len(embedding)
+        # Declared in the model registry, so no model load or inference is needed
+        return self.embedder.embedding_dim
+
+    def create_collection(self, name: str, expected_rows: int = 0, latency_target_ms: float = None):
+        """
+        Create a collection with an index chosen for its expected size (see index_config.choose_index).
 
-    def create_collection(self, name: str):
+        Args:
+            name: Collection name.
+            expected_rows: Number of vectors the collection is expected to hold. Call tune_index
+                           after loading data to re-pick the index from the actual row count.
+            latency_target_ms: Desired per-query latency. Defaults to the constructor's value.
+        """
         fields = [
-            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
-            FieldSchema(name="file", dtype=DataType.VARCHAR, max_length=256),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=self.embedding_dim),
-            FieldSchema(name="metadata", dtype=DataType.JSON)
+            # Derived from (file, chunk) by primary_keys.item_primary_key, so re-ingestion is idempotent
+            FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=False),
+            # Partition key: filters on file only touch that file's partition
+            FieldSchema(name="file", dtype=DataType.VARCHAR, max_length=256, is_partition_key=True),
+            FieldSchema(
+                name="embedding",
+                dtype=DataType.FLOAT16_VECTOR if self.vector_dtype == np.float16 else DataType.FLOAT_VECTOR,
+                dim=self.embedding_dim
+            ),
+            FieldSchema(name="metadata", dtype=DataType.JSON),
+            # The chunk itself, returned with every hit so callers need no extra fetch
+            FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=TEXT_MAX_BYTES),
+            FieldSchema(name="media_type", dtype=DataType.VARCHAR, max_length=32),
+            FieldSchema(name="page", dtype=DataType.INT64),
+            FieldSchema(name="start_seconds", dtype=DataType.FLOAT),
+            FieldSchema(name="end_seconds", dtype=DataType.FLOAT),
         ]
+        if self.hybrid:
+            fields.append(FieldSchema(name="sparse_embedding", dtype=DataType.SPARSE_FLOAT_VECTOR))
         schema = CollectionSchema(fields, f"{name} embeddings")
-        collection = Collection(name=name, schema=schema)
-        index_params = {
-            "metric_type": "L2",
-            "index_type": "IVF_FLAT",
-            "params": {"nlist": 1024}
-        }
+        collection = Collection(name=name, schema=schema, num_partitions=self.num_partitions)
+        index_params = choose_index(
+            expected_rows, self.embedding_dim, latency_target_ms or self.latency_target_ms, quantize=self.quantize_index
+        )
         collection.create_index(field_name="embedding", index_params=index_params)
+        self._index_params[name] = index_params
+        if self.hybrid:
+            collection.create_index(
+                field_name="sparse_embedding",
+                index_params={"metric_type": "IP", "index_type": "SPARSE_INVERTED_INDEX", "params": {}}
+            )
+        self._collection_handles[name] = collection
+        self._loaded.discard(name)
+        self._row_counts.pop(name, None)
+        self._checked_at.pop(name, None)
+        self._invalidate(name)
         return collection
 
-    def insert(self, data: List[Dict[str, Any]]):
+    def tune_index(self, name: str, latency_target_ms: float = None) -> Dict[str, Any]:
+        """
+        Re-pick the vector index of a collection from its current row count, rebuilding it if
+        the choice changed. A loaded collection is released during the rebuild and reloaded.
+
+        Returns:
+            dict: The index params now in use.
+        """
+        collection = self._get_collection(name)
+        collection.flush()
+        index_params = choose_index(
+            collection.num_entities, self.embedding_dim, latency_target_ms or self.latency_target_ms,
+            quantize=self.quantize_index
+        )
+        if index_params == self._get_index_params(name):
+            return index_params
+
+        was_loaded = name in self._loaded
+        self.release([name])
+        for index in collection.indexes:
+            if index.field_name == "embedding":
+                index.drop()
+        collection.create_index(field_name="embedding", index_params=index_params)
+        self._index_params[name] = index_params
+        self._invalidate(name)
+        if was_loaded:
+            self.warm_up([name])
+        return index_params
+
+    def _get_index_params(self, name: str) -> Dict[str, Any]:
+        if name not in self._index_params:
+            params = {}
+            for index in self._get_collection(name).indexes:
+                if index.field_name == "embedding":
+                    params = dict(index.params)
+                    # Older servers return the nested params as a JSON string
+                    if isinstance(params.get("params"), str):
+                        params["params"] = json.loads(params["params"])
+            self._index_params[name] = params
+        return self._index_params[name]
+
+    def _search_param(self, name: str, top_k: int) -> Dict[str, Any]:
+        return search_params_for(self._get_index_params(name), top_k=top_k, latency_target_ms=self.latency_target_ms)
+
+    def insert(self, data: List[Dict[str, Any]], batch_size: int = 1000) -> Dict[str, Any]:
+        return self.bulk_insert(data, batch_size=batch_size)
+
+    def bulk_insert(self, data: List[Dict[str, Any]], batch_size: int = 1000, upsert: bool = False,
+                    flush: bool = True) -> Dict[str, Any]:
+        """
+        Embed and insert items, grouped by their 'type' collection.
+
+        Each group is embedded and sent to Milvus as columnar inserts of up to batch_size rows,
+        and every touched collection is flushed once at the end. Primary keys are derived from
+        (file, chunk), so with upsert=True rows that already exist are replaced rather than duplicated.
+
+        Callers inserting in many rounds, like the migrator, pass flush=False and call flush()
+        once when done: Milvus rate-limits flushes.
+
+        Returns:
+            dict: 'counts' maps each type to the number of rows inserted, and 'failed' lists
+            {'item', 'error'} entries for rows that were rejected or whose batch failed.
+        """
+        counts = {}
+        failed = []
+
+        groups = {}
         for item in data:
-            collection_name = self.collections[item['type']]
-            collection = Collection(name=collection_name)
+            if item.get('type') not in self.collections:
+                failed.append({"item": item, "error": f"Unknown type {item.get('type')!r}"})
+            elif not item.get('text'):
+                failed.append({"item": item, "error": "Missing text"})
+            elif not item.get('file'):
+                failed.append({"item": item, "error": "Missing file"})
+            else:
+                groups.setdefault(item['type'], []).append(item)
 
-            embedding = self.embedder.get_embedding(item['text'], model='bgem3')
+        for item_type, items in groups.items():
+            collection = self._get_collection(self.collections[item_type])
+            counts[item_type] = 0
 
-            if len(embedding) != self.embedding_dim:
-                raise ValueError(f"Embedding dimension mismatch. Expected {self.embedding_dim}, got {len(embedding)}")
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                try:
+                    columns = self._ordered_columns(collection, self._build_columns(batch))
+                    if upsert:
+                        collection.upsert(columns)
+                    else:
+                        collection.insert(columns)
+                    counts[item_type] += len(batch)
+                except (MilvusException, ValueError) as e:
+                    print(f"Error inserting {len(batch)} rows into '{collection.name}': {e}")
+                    failed.extend({"item": item, "error": str(e)} for item in batch)
 
-            # Extract metadata (all fields except 'type', 'file', and 'text')
-            metadata = {k: v for k, v in item.items() if k not in ['type', 'file', 'text']}
+            if flush:
+                collection.flush()
+            if collection.name in self._row_counts:
+                self._row_counts[collection.name] += counts[item_type]
+            self._invalidate(collection.name)
 
-            document = {
-                "file": item['file'],
-                "embedding": embedding.tolist(),
-                "metadata": metadata
-            }
+        return {"counts": counts, "failed": failed}
+
+    def upsert_file(self, file: str, items: List[Dict[str, Any]], batch_size: int = 1000,
+                    flush: bool = True) -> Dict[str, Any]:
+        """
+        Replace the vectors of one file with `items`, leaving every other file untouched.
+
+        Returns:
+            dict: The bulk_insert summary.
+        """
+        return self.upsert_files({file: items}, batch_size=batch_size, flush=flush)
 
-            collection.insert([document])
+    def upsert_files(self, files: Dict[str, List[Dict[str, Any]]], batch_size: int = 1000,
+                     flush: bool = True) -> Dict[str, Any]:
+        """
+        Replace the vectors of several files, leaving every other file untouched.
 
-    def similarity_search(self, query_text: str, top_k: int = 5):
-        query_embedding = self.embedder.get_embedding(query_text, model='bgem3')
-        all_results = []
+        The new chunks of all files are embedded and upserted together, in batches of
+        batch_size, then rows of each file that are not part of its new version (e.g. trailing
+        chunks of a document that got shorter) are deleted, so the files stay searchable throughout.
 
-        for collection_name in self.collections.values():
-            collection = Collection(name=collection_name)
+        Args:
+            files: File name -> its items, as passed to bulk_insert.
+            batch_size: Rows per embedding batch and upsert request.
+            flush: Flush the touched collections when done; see bulk_insert.
+
+        Returns:
+            dict: The bulk_insert summary.
+        """
+        items = [dict(item, file=file) for file, file_items in files.items() for item in file_items]
+        summary = self.bulk_insert(items, batch_size=batch_size, upsert=True, flush=False)
+
+        kept = {}
+        for item in items:
+            if item.get('type') in self.collections and item.get('text'):
+                kept.setdefault(item['file'], {}).setdefault(self.collections[item['type']], set()).add(
+                    item_primary_key(item)
+                )
+        for file in files:
+            try:
+                if file in kept:
+                    for name, keep_ids in kept[file].items():
+                        self._delete_stale(name, file, keep_ids)
+                else:
+                    # Nothing left of the file: drop its rows wherever they are
+                    self.delete_file(file)
+            except MilvusException as e:
+                print(f"Error removing stale rows of '{file}': {e}")
+                summary['failed'].append({"item": {"file": file}, "error": str(e)})
+
+        touched = [self.collections[item_type] for item_type in summary['counts']]
+        if flush and touched:
+            self.flush(touched)
+        return summary
+
+    def _delete_stale(self, name: str, file: str, keep_ids: set):
+        """
+        Delete the rows of a file in one collection whose ids are not in keep_ids.
+
+        The file's ids are read back and only the stale ones are named in the delete, so the
+        expression stays small however many chunks the file has.
+        """
+        # Queries and deletes by expression need the collection loaded
+        self.warm_up([name])
+        collection = self._get_collection(name)
+        file_expr = build_filter_expr(file=file)
+        iterator = collection.query_iterator(batch_size=self.DELETE_SCAN_BATCH, expr=file_expr, output_fields=["id"])
+        stale = []
+        try:
+            while True:
+                rows = iterator.next()
+                if not rows:
+                    break
+                stale.extend(row["id"] for row in rows if row["id"] not in keep_ids)
+        finally:
+            iterator.close()
+        if stale:
+            collection.delete(expr=combine_exprs(file_expr, f"id in {stale}"))
+            self._invalidate(name)
+
+    def flush(self, names: List[str] = None):
+        """
+        Seal pending inserts and deletes of collections, e.g. once after many bulk_insert(flush=False) calls.
+
+        Args:
+            names: Collection names to flush. Defaults to every existing collection in self.collections.
+        """
+        for name in names or self.collections.values():
+            if utility.has_collection(name):
+                self._get_collection(name).flush()
+
+    def delete_file(self, file, expr: str = None):
+        """
+        Delete all vectors of a file from every collection.
+
+        Args:
+            file (str | list[str]): The 'file' value the rows were inserted with, or a list of them
+                to delete several files with one request per collection.
+            expr: Optional further condition rows must also match to be deleted.
+        """
+        file_expr = build_filter_expr(file=file)
+        # Deletes by expression need the collection loaded; missing collections are skipped
+        self.warm_up(list(self.collections.values()))
+        for name in self.collections.values():
+            if name not in self._loaded:
+                continue
+            self._get_collection(name).delete(expr=combine_exprs(file_expr, expr))
+            self._invalidate(name)
+
+    def warm_up(self, names: List[str] = None, refresh: bool = False):
+        """
+        Load collections into memory once, so searches do not pay for index loading.
+
+        Collections that do not exist are skipped. Loaded collections stay loaded until
+        release() is called. Searches re-check missing and empty collections every
+        recheck_seconds on their own.
+
+        Args:
+            names: Collection names to load. Defaults to all collections in self.collections.
+            refresh: Re-read row counts of already loaded collections, e.g. after another
+                     process inserted into a collection that was empty.
+        """
+        for name in names or self.collections.values():
+            if name in self._loaded and not refresh:
+                continue
+            if not utility.has_collection(name):
+                self._checked_at[name] = time.monotonic()
+                continue
+            collection = self._get_collection(name)
             collection.load()
+            self._loaded.add(name)
+            self._row_counts[name] = collection.num_entities
+            if self._row_counts[name]:
+                self._checked_at.pop(name, None)
+            else:
+                self._checked_at[name] = time.monotonic()
+
+    def release(self, names: List[str] = None):
+        """
+        Release collections loaded by warm_up (or by a search) from memory.
+
+        Args:
+            names: Collection names to release. Defaults to every collection loaded by this process.
+        """
+        for name in list(names or self._loaded):
+            if name in self._loaded:
+                self._get_collection(name).release()
+                self._loaded.discard(name)
+                self._checked_at.pop(name, None)
+
+    def _searchable_collections(self, modalities: List[str] = None) -> List[str]:
+        """
+        Collections to search: loaded on first use, skipping missing and empty ones. Those are
+        looked at again once recheck_seconds have passed, so data ingested by another process
+        becomes searchable without a manual warm_up(refresh=True).
+
+        Args:
+            modalities: Keys of self.collections to restrict the search to. Defaults to all.
+        """
+        names = [self.collections[modality] for modality in modalities] if modalities else list(self.collections.values())
+        now = time.monotonic()
+        due = [name for name in names if self._due_for_check(name, now)]
+        if due:
+            self.warm_up(due, refresh=True)
+        return [name for name in names if self._row_counts.get(name)]
 
-            results = collection.search(
-                data=[query_embedding.tolist()],
+    def _due_for_check(self, name: str, now: float) -> bool:
+        if name in self._loaded and self._row_counts.get(name):
+            return False
+        checked_at = self._checked_at.get(name)
+        return checked_at is None or now - checked_at >= self.recheck_seconds
+
+    def _get_collection(self, name: str) -> Collection:
+        if name not in self._collection_handles:
+            self._collection_handles[name] = Collection(name=name)
+        return self._collection_handles[name]
+
+    def _build_columns(self, batch: List[Dict[str, Any]]) -> Dict[str, list]:
+        """
+        Embed a batch and lay it out as one list per schema field.
+        """
+        texts = [item['text'] for item in batch]
+        if self.hybrid:
+            # Dense and sparse vectors from a single forward pass
+            encoded = self.embedder.get_multi_embeddings(texts, return_colbert=False)
+            embeddings, sparse_embeddings = encoded['dense'], encoded['sparse']
+        else:
+            embeddings = self.embedder.get_embeddings(texts, model='bgem3', dtype=self.vector_dtype.name)
+            sparse_embeddings = None
+
+        if embeddings.shape[1] != self.embedding_dim:
+            raise ValueError(f"Embedding dimension mismatch. Expected {self.embedding_dim}, got {embeddings.shape[1]}")
+
+        columns = {
+            "id": [item_primary_key(item) for item in batch],
+            "file": [item['file'] for item in batch],
+            "embedding": self._vector_rows(embeddings),
+            # Extract metadata (all fields except 'type', 'file', and 'text')
+            "metadata": [{k: v for k, v in item.items() if k not in ['type', 'file', 'text']} for item in batch],
+            "text": [truncate_utf8(text) for text in texts],
+        }
+        if self.hybrid:
+            columns["sparse_embedding"] = sparse_embeddings
+        scalars = [scalar_fields(item) for item in batch]
+        for field in SCALAR_DEFAULTS:
+            columns[field] = [values[field] for values in scalars]
+        return columns
+
+    def _vector_rows(self, embeddings: np.ndarray) -> list:
+        # pymilvus takes FLOAT16_VECTOR rows as float16 arrays and FLOAT_VECTOR rows as lists
+        if self.vector_dtype == np.float16:
+            return list(np.asarray(embeddings, dtype=np.float16))
+        return np.asarray(embeddings, dtype=np.float32).tolist()
+
+    @staticmethod
+    def _ordered_columns(collection: Collection, columns: Dict[str, list]) -> List[list]:
+        # Columnar inserts must follow the schema's field order, without auto-generated fields
+        return [columns[field.name] for field in collection.schema.fields if not field.auto_id]
+
+    def similarity_search(self, query_text: str, top_k: int = 5, timeout: float = None,
+                          filters: Dict[str, Any] = None, expr: str = None, modalities: List[str] = None):
+        """
+        Search all collections concurrently and merge their hits by distance.
+
+        Args:
+            query_text: The query.
+            top_k: Number of results to return.
+            timeout: Seconds each collection gets before it is left out of the results.
+                     Defaults to the constructor's search_timeout.
+            filters: Keyword arguments for search_filters.build_filter_expr, e.g.
+                     {"file": "report_pdf.json"} or {"time_range": (10, 60)}. Applied by Milvus
+                     before the vector search; a file filter prunes partitions.
+            expr: A raw Milvus boolean expression, ANDed with the filters.
+            modalities: Keys of self.collections ("document", "audio", "image") to search.
+                        Other collections are not queried at all.
+
+        Returns:
+            list: Up to top_k hits, closest first, each with 'collection', 'file', 'metadata',
+            the matched chunk 'text' and 'distance'.
+        """
+        collection_names = self._searchable_collections(modalities)
+        cache_key = self._cache_key("similarity", query_text, top_k, collection_names, filters, expr)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        start_time = time.perf_counter()
+        timeout = timeout or self.search_timeout
+        expr = combine_exprs(build_filter_expr(**(filters or {})), expr)
+        query_embeddings = self.embedder.get_embeddings([query_text], model='bgem3', dtype=self.vector_dtype.name)
+
+        def search(collection_name):
+            results = self._get_collection(collection_name).search(
+                data=self._vector_rows(query_embeddings),
                 anns_field="embedding",
-                param={"metric_type": "L2", "params": {"nprobe": 10}},
+                param=self._search_param(collection_name, top_k),
                 limit=top_k,
-                output_fields=["file", "metadata"]
+                expr=expr or None,
+                output_fields=self._output_fields(collection_name),
+                timeout=timeout
+            )
+            return self._hits_to_results(collection_name, results[0], "distance")
+
+        per_collection = self._fan_out(search, collection_names, timeout)
+        results = self._merge_top_k(per_collection, top_k, key=lambda x: x['distance'])
+        if len(per_collection) == len(collection_names):
+            self._cache_put(cache_key, results, start_time)
+        return results
+
+    def batch_similarity_search(self, queries: List[str], top_k: int = 5, timeout: float = None,
+                                filters: Dict[str, Any] = None, expr: str = None,
+                                modalities: List[str] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Search many queries at once.
+
+        All queries are embedded in one batched pass and sent to each collection as a single
+        multi-vector search; collections are still searched concurrently. filters, expr and
+        modalities apply to every query, as in similarity_search.
+
+        Queries found in the query cache are answered from it and left out of the batch.
+
+        Returns:
+            list: One ranked result list per query, in the order of `queries`, each shaped like
+            the result of similarity_search.
+        """
+        if not queries:
+            return []
+        collection_names = self._searchable_collections(modalities)
+        cache_keys = [self._cache_key("similarity", query, top_k, collection_names, filters, expr) for query in queries]
+        answers = [self._cache_get(key) for key in cache_keys]
+        pending = [i for i, answer in enumerate(answers) if answer is None]
+        if not pending:
+            return answers
+
+        start_time = time.perf_counter()
+        timeout = timeout or self.search_timeout
+        expr = combine_exprs(build_filter_expr(**(filters or {})), expr)
+        query_embeddings = self.embedder.get_embeddings(
+            [queries[i] for i in pending], model='bgem3', dtype=self.vector_dtype.name
+        )
+
+        def search(collection_name):
+            results = self._get_collection(collection_name).search(
+                data=self._vector_rows(query_embeddings),
+                anns_field="embedding",
+                param=self._search_param(collection_name, top_k),
+                limit=top_k,
+                expr=expr or None,
+                output_fields=self._output_fields(collection_name),
+                timeout=timeout
+            )
+            return [self._hits_to_results(collection_name, hits, "distance") for hits in results]
+
+        per_collection = self._fan_out(search, collection_names, timeout)
+        complete = len(per_collection) == len(collection_names)
+        for position, i in enumerate(pending):
+            answers[i] = self._merge_top_k(
+                [results[position] for results in per_collection], top_k, key=lambda x: x['distance']
+            )
+        if complete:
+            # The batch shares one search call, so each query is credited an equal share of it
+            elapsed_ms = (time.perf_counter() - start_time) * 1000 / len(pending)
+            for i in pending:
+                self._cache_put(cache_keys[i], answers[i], elapsed_ms=elapsed_ms)
+        return answers
+
+    def hybrid_search(self, query_text: str, top_k: int = 5, rrf_k: int = 60, timeout: float = None,
+                      filters: Dict[str, Any] = None, expr: str = None, modalities: List[str] = None):
+        """
+        Search each collection with the dense and the sparse query vector and fuse the two
+        rankings with reciprocal rank fusion. Both query vectors come from one forward pass,
+        and Milvus runs the two searches of a collection in parallel. filters, expr and
+        modalities restrict both searches, as in similarity_search.
+
+        Results carry a fused 'score' (higher is better) instead of a distance.
+        """
+        if not self.hybrid:
+            raise ValueError("hybrid_search requires a MilvusDB created with hybrid=True.")
+
+        collection_names = self._searchable_collections(modalities)
+        cache_key = self._cache_key("hybrid", query_text, top_k, collection_names, filters, expr, rrf_k=rrf_k)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        start_time = time.perf_counter()
+        timeout = timeout or self.search_timeout
+        encoded = self.embedder.get_multi_embeddings([query_text], return_colbert=False)
+        dense_query, sparse_query = encoded['dense'][:1], encoded['sparse'][0]
+        expr = combine_exprs(build_filter_expr(**(filters or {})), expr)
+
+        def search(collection_name):
+            requests = [
+                AnnSearchRequest(
+                    data=self._vector_rows(dense_query),
+                    anns_field="embedding",
+                    param=self._search_param(collection_name, top_k),
+                    limit=top_k,
+                    expr=expr or None
+                ),
+            ]
+            # Nothing lexical to match on (e.g. only punctuation): the dense ranking alone is
+            # fused, so results keep the same 'score' scale
+            if sparse_query:
+                requests.append(AnnSearchRequest(
+                    data=[sparse_query],
+                    anns_field="sparse_embedding",
+                    param={"metric_type": "IP", "params": {}},
+                    limit=top_k,
+                    expr=expr or None
+                ))
+            results = self._get_collection(collection_name).hybrid_search(
+                requests, rerank=RRFRanker(rrf_k), limit=top_k,
+                output_fields=self._output_fields(collection_name), timeout=timeout
             )
+            return self._hits_to_results(collection_name, results[0], "score")
+
+        per_collection = self._fan_out(search, collection_names, timeout)
+        results = self._merge_top_k(per_collection, top_k, key=lambda x: x['score'], reverse=True)
+        if len(per_collection) == len(collection_names):
+            self._cache_put(cache_key, results, start_time)
+        return results
 
-            for hit in results[0]:
-                all_results.append({
-                    "collection": collection_name,
-                    "file": hit.entity.get('file'),
-                    "metadata": hit.entity.get('metadata'),
-                    "distance": hit.distance
-                })
+    def _cache_key(self, kind, query_text, top_k, collection_names, filters, expr, **params):
+        if self.query_cache is None:
+            return None
+        return self.query_cache.make_key(kind, query_text, top_k, collection_names, filters=filters, expr=expr, **params)
 
-            collection.release()
+    def _cache_get(self, cache_key):
+        if cache_key is None or self.query_cache is None:
+            return None
+        return self.query_cache.get(cache_key)
 
-        all_results.sort(key=lambda x: x['distance'])
+    def _cache_put(self, cache_key, results, start_time=None, elapsed_ms=None):
+        # Only complete answers are cached; partial results from a timed out collection are not
+        if cache_key is None or self.query_cache is None:
+            return
+        if elapsed_ms is None:
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+        self.query_cache.put(cache_key, results, elapsed_ms)
+
+    def _invalidate(self, collection_name: str):
+        if self.query_cache is not None:
+            self.query_cache.invalidate(collection_name)
+
+    def _output_fields(self, name: str) -> List[str]:
+        # Collections created before the text field was added return hits without text
+        fields = {field.name for field in self._get_collection(name).schema.fields}
+        return [field for field in ("file", "metadata", "text") if field in fields]
+
+    @staticmethod
+    def _hits_to_results(collection_name: str, hits, score_field: str) -> List[Dict[str, Any]]:
+        return [
+            {
+                "collection": collection_name,
+                "file": hit.entity.get('file'),
+                "metadata": hit.entity.get('metadata'),
+                "text": hit.entity.get('text'),
+                score_field: hit.distance
+            }
+            for hit in hits
+        ]
 
-        return all_results[:top_k]
+    def _fan_out(self, search, collection_names: List[str], timeout: float) -> List[Any]:
+        """
+        Run search(collection_name) for every collection on the search thread pool.
+
+        Collections that fail or do not answer within timeout seconds are reported and left
+        out, so the caller gets partial results instead of waiting on the slowest collection.
+
+        Returns:
+            list: The results of the collections that answered, in collection order.
+        """
+        futures = {name: self._search_executor.submit(search, name) for name in collection_names}
+        wait(futures.values(), timeout=timeout)
+
+        results = []
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                print(f"Search in collection '{name}' timed out after {timeout}s; returning partial results")
+                continue
+            try:
+                results.append(future.result())
+            except MilvusException as e:
+                print(f"Search in collection '{name}' failed: {e}")
+        return results
+
+    @staticmethod
+    def _merge_top_k(sorted_lists: List[List[Dict[str, Any]]], top_k: int, key, reverse: bool = False):
+        # Each collection already returns its hits in rank order, so a k-way heap merge
+        # only has to look at the first top_k entries overall
+        return list(islice(heapq.merge(*sorted_lists, key=key, reverse=reverse), top_k))
 
     def remove_all_collections(self):
         existing_collections = utility.list_collections()
         for collection_name in existing_collections:
             utility.drop_collection(collection_name)
+            self._invalidate(collection_name)
+        self._collection_handles.clear()
+        self._loaded.clear()
+        self._row_counts.clear()
+        self._checked_at.clear()
+        self._index_params.clear()
 
     def list_collections(self):
         return connections.list_collections()
@@ -116,13 +713,13 @@ if __name__ == "__main__":
 
     moby_dick_path = '../../../mobydick.txt'
     moby_dick_lines = load_moby_dick(moby_dick_path)
-    milvus = MilvusDB()
+    milvus = MilvusDB(hybrid=True)
     milvus.remove_all_collections()
 
     # Create collections for each media type
     for collection_name in milvus.collections.values():
         print(f"Creating collection: {collection_name}")
-        milvus.create_collection(collection_name)
+        milvus.create_collection(collection_name, expected_rows=len(moby_dick_lines))
 
     # Prepare Moby Dick data
     moby_dick_data = []
@@ -137,8 +734,12 @@ if __name__ == "__main__":
 
     # Insert embeddings using BGE-M3
     print(f"Inserting {len(moby_dick_data)} lines from Moby Dick...")
-    for item in tqdm(moby_dick_data):
-        milvus.insert([item])
+    summary = milvus.bulk_insert(moby_dick_data, batch_size=2048)
+    print(f"Inserted rows: {summary['counts']}, failed rows: {len(summary['failed'])}")
+    print(f"Document index: {milvus.tune_index(milvus.collections['document'])}")
+
+    # Load the collections once; every search below reuses them
+    milvus.warm_up()
 
     # Perform a similarity search
     query_text = "Call me Ishmael"
@@ -149,7 +750,24 @@ if __name__ == "__main__":
         print(f"{i}. File: {result['file']}")
         print(f"   Page: {result['metadata']['page']}, Line: {result['metadata']['line']}")
         print(f"   Distance: {result['distance']}")
-        print(f"   Text: {moby_dick_lines[result['metadata']['page'] * 40 + result['metadata']['line'] - 41]}")
+        print(f"   Text: {result['text']}")
         print()
 
+    # Restrict the search to the first ten pages; Milvus filters before the vector search
+    results = milvus.similarity_search(query_text, top_k=5, filters={"file": "mobydick.txt", "page_range": (1, 10)})
+    print(f"\nResults on pages 1-10: {[(r['metadata']['page'], r['metadata']['line']) for r in results]}")
+
+    # Perform a hybrid (dense + sparse) search
+    results = milvus.hybrid_search("Ishmael", top_k=5)
+
+    print("\nHybrid search results:")
+    for i, result in enumerate(results, 1):
+        print(f"{i}. Page: {result['metadata']['page']}, Line: {result['metadata']['line']}, Score: {result['score']:.4f}")
+        print(f"   Text: {result['text']}")
+
+    # Repeating a query is answered from the query cache until the collections change
+    milvus.similarity_search(query_text, top_k=5)
+    print(f"\nQuery cache: {milvus.query_cache.stats()}")
+
+    milvus.release()
     milvus.disconnect()
\ No newline at end of file
@@ -1,40 +1,368 @@
 import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import gzip
+import certifi
+import urllib3
 from minio import Minio
-from minio.error import S3Error
+from minio.deleteobjects import DeleteObject
+from minio.error import MinioException, S3Error, ServerError
 from dotenv import load_dotenv
 from io import BytesIO
 import json
 
+from object_cache import ObjectCache
+
+# S3 error codes that will not go away by retrying
+PERMANENT_S3_ERRORS = {"NoSuchBucket", "AccessDenied", "InvalidAccessKeyId", "SignatureDoesNotMatch", "InvalidBucketName"}
+
+# Record lists that the sharded layout stores one record at a time, and the field each record is looked up by
+SHARDED_FIELDS = {"pages": "page_number", "transcription": "start_time"}
+# Suffixes of the two objects of a sharded document: the packed records and their offset index
+RECORDS_SUFFIX = ".records"
+INDEX_SUFFIX = ".index"
+
+# Content-Encoding values written by compress_payload and understood by decompress_payload
+COMPRESSIONS = ("zstd", "gzip")
+
+# Default of MinIOClient(compression=): read $MINIO_COMPRESSION, unlike an explicit None
+FROM_ENV = object()
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client():
+    """
+    The process-wide MinIOClient, created on first use.
+
+    All uploaders share it, so the process keeps one connection pool instead of one per class.
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = MinIOClient()
+        return _shared_client
+
+
+def compress_payload(data, compression):
+    """
+    Compress bytes with 'zstd' (needs the zstandard package) or 'gzip'; None returns them as is.
+    """
+    if compression is None:
+        return data
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    raise ValueError(f"Invalid compression specified. Choose one of {COMPRESSIONS} or None.")
+
+
+def decompress_payload(data, content_encoding):
+    """
+    Undo compress_payload, given the Content-Encoding the object was stored with. Objects
+    without a (known) encoding, such as those uploaded before compression, are returned as is.
+    """
+    if content_encoding == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if content_encoding == "gzip":
+        return gzip.decompress(data)
+    return data
+
+
 class MinIOClient:
-    def __init__(self):
+    def __init__(self, max_pool_connections=None, compression=FROM_ENV, cache=None, sharded_layout=None):
+        """
+        Args:
+            max_pool_connections (int): Connections kept open per host. Defaults to
+                $MINIO_MAX_POOL_CONNECTIONS or 32; it should be at least the number of threads
+                that use the client at once (see upload_many), or requests queue for a connection.
+            compression (str): Compress uploaded JSON with 'zstd' or 'gzip', recorded in the
+                object's Content-Encoding. Defaults to $MINIO_COMPRESSION, else no compression;
+                None turns compression off even when the variable is set.
+                Reads decompress according to each object's own encoding, whatever this is set to.
+            cache (ObjectCache): Local read-through cache for whole-object reads. Defaults to an
+                ObjectCache() when $MINIO_OBJECT_CACHE is 'true', else no caching.
+            sharded_layout (bool): Whether the buckets may hold documents uploaded with
+                sharded=True. Only then does a plain upload also delete the document's sharded
+                objects, which costs one more request per upload. Defaults to
+                $MINIO_SHARDED_LAYOUT == 'true'.
+        """
         load_dotenv()
+        self.max_pool_connections = max_pool_connections or int(os.getenv("MINIO_MAX_POOL_CONNECTIONS", "32"))
+        if compression is FROM_ENV:
+            compression = os.getenv("MINIO_COMPRESSION")
+        self.compression = compression or None
+        if self.compression is not None and self.compression not in COMPRESSIONS:
+            raise ValueError(f"Invalid compression specified. Choose one of {COMPRESSIONS} or None.")
+        if cache is None and os.getenv("MINIO_OBJECT_CACHE", "").lower() == 'true':
+            cache = ObjectCache()
+        self.cache = cache
+        if sharded_layout is None:
+            sharded_layout = os.getenv("MINIO_SHARDED_LAYOUT", "").lower() == 'true'
+        self.sharded_layout = sharded_layout
+        # Same settings as the minio default client, with a pool sized for concurrent uploads
+        http_client = urllib3.PoolManager(
+            maxsize=self.max_pool_connections,
+            block=True,
+            timeout=urllib3.Timeout(connect=10, read=300),
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=os.getenv("SSL_CERT_FILE") or certifi.where(),
+            retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+        )
         self.client = Minio(
             os.getenv("MINIO_URL"),
             access_key=os.getenv("MINIO_ACCESS_KEY"),
             secret_key=os.getenv("MINIO_SECRET_KEY"),
-            secure=os.getenv("MINIO_SECURE").lower() == 'true'
+            secure=os.getenv("MINIO_SECURE").lower() == 'true',
+            http_client=http_client
         )
 
-    def upload_json_to_minio(self, bucket_name, object_name, json_data):
+    def upload_json_to_minio(self, bucket_name, object_name, json_data, sharded=False):
         """
         Uploads JSON metadata to MinIO.
+
+        With sharded=True, a document with 'pages' or a 'transcription' is stored as a packed
+        blob of its records plus a small offset index instead of one JSON object, so get_page
+        and get_segment can fetch a single record with a ranged GET (see _put_sharded).
         """
         try:
-            json_bytes = json.dumps(json_data, ensure_ascii=False).encode('utf-8')
-            json_stream = BytesIO(json_bytes)
-            self.client.put_object(
-                bucket_name, object_name, json_stream, len(json_bytes), content_type="application/json"
-            )
+            if sharded and any(isinstance(json_data.get(field), list) for field in SHARDED_FIELDS):
+                self._put_sharded(bucket_name, object_name, json_data)
+            else:
+                self._put_plain(bucket_name, object_name, json_data)
             print(f"Successfully uploaded JSON metadata '{object_name}' to bucket '{bucket_name}'")
         except S3Error as e:
             print(f"Error uploading JSON metadata: {e}")
 
+    def put_json(self, bucket_name, object_name, json_data, metadata=None):
+        """
+        Store one JSON document in the plain layout, like upload_json_to_minio, but raise on failure.
+
+        Args:
+            metadata (dict): User metadata stored with the object, read back by stat_metadata.
+
+        Raises:
+            S3Error: If the object could not be stored.
+        """
+        self._put_plain(bucket_name, object_name, json_data, metadata)
+
+    def get_json(self, bucket_name, object_name):
+        """
+        Download and parse one JSON object in the plain layout (through the cache, if any).
+
+        Raises:
+            S3Error: If the object cannot be read, e.g. with code 'NoSuchKey' when it does not exist.
+        """
+        return self._read_json(bucket_name, object_name)
+
+    def stat_metadata(self, bucket_name, object_name):
+        """
+        Returns:
+            dict: The user metadata of an object (lower-case keys without the 'x-amz-meta-'
+            prefix), or None if the object does not exist.
+        """
+        try:
+            stat = self.client.stat_object(bucket_name, object_name)
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchBucket"):
+                return None
+            raise
+        prefix = "x-amz-meta-"
+        return {
+            key.lower()[len(prefix):]: value
+            for key, value in (stat.metadata or {}).items() if key.lower().startswith(prefix)
+        }
+
+    def ensure_bucket(self, bucket_name):
+        """
+        Create a bucket unless it exists.
+        """
+        if not self.client.bucket_exists(bucket_name):
+            self.client.make_bucket(bucket_name)
+
+    def upload_many(self, bucket_name, items, max_workers=16, retries=3, backoff=0.5):
+        """
+        Upload many JSON documents concurrently.
+
+        Items are consumed lazily and at most 2 * max_workers documents are held at a time, so
+        a generator over a large backfill is streamed rather than materialized. Failed uploads
+        are retried with exponential backoff and jitter, except for errors that cannot succeed
+        on retry (e.g. a missing bucket).
+
+        Args:
+            bucket_name (str): Target bucket.
+            items (iterable): (object_name, json_data) pairs.
+            max_workers (int): Concurrent uploads; capped at the connection pool size.
+            retries (int): Retries per object after the first attempt.
+            backoff (float): Base delay in seconds; attempt n waits about backoff * 2 ** n.
+
+        Returns:
+            dict: 'uploaded', the list of object names stored, and 'failed', a dict mapping the
+            object names that could not be stored to their last error.
+        """
+        max_workers = max(1, min(max_workers, self.max_pool_connections))
+        uploaded, failed = [], {}
+
+        def upload(object_name, json_data):
+            for attempt in range(retries + 1):
+                try:
+                    self._put_plain(bucket_name, object_name, json_data)
+                    return
+                except S3Error as e:
+                    if e.code in PERMANENT_S3_ERRORS or attempt == retries:
+                        raise
+                # Server errors and unparsable responses are MinioException but not S3Error
+                except (MinioException, urllib3.exceptions.HTTPError, OSError):
+                    if attempt == retries:
+                        raise
+                time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        def collect(done):
+            for future in done:
+                object_name = pending.pop(future)
+                try:
+                    future.result()
+                    uploaded.append(object_name)
+                except Exception as e:
+                    # Any per-item error, e.g. a document json.dumps cannot serialize, is reported
+                    # rather than aborting the whole batch
+                    failed[object_name] = str(e)
+
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="minio-upload") as executor:
+            for object_name, json_data in items:
+                if len(pending) >= 2 * max_workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[executor.submit(upload, object_name, json_data)] = object_name
+            collect(wait(pending).done)
+
+        print(f"Uploaded {len(uploaded)} objects to bucket '{bucket_name}', {len(failed)} failed")
+        return {"uploaded": uploaded, "failed": failed}
+
+    def _put_json(self, bucket_name, object_name, json_data, metadata=None):
+        json_bytes = compress_payload(json.dumps(json_data, ensure_ascii=False).encode('utf-8'), self.compression)
+        metadata = dict(metadata or {})
+        if self.compression:
+            metadata["Content-Encoding"] = self.compression
+        self.client.put_object(
+            bucket_name, object_name, BytesIO(json_bytes), len(json_bytes), content_type="application/json",
+            metadata=metadata or None
+        )
+        self._invalidate(bucket_name, object_name)
+
+    def _put_plain(self, bucket_name, object_name, json_data, metadata=None):
+        """
+        Store a document as one JSON object. With sharded_layout, its sharded objects from an
+        earlier upload are removed as well; otherwise they are left in place, and only get_page
+        and get_segment still read them (get_metadata_from_minio and iter_bucket prefer the
+        plain object).
+        """
+        self._put_json(bucket_name, object_name, json_data, metadata)
+        if not self.sharded_layout:
+            return
+        stale = [object_name + INDEX_SUFFIX, object_name + RECORDS_SUFFIX]
+        # Both in one request; absent objects are not an error
+        for error in self.client.remove_objects(bucket_name, [DeleteObject(name) for name in stale]):
+            print(f"Error removing stale '{error.name}' from bucket '{bucket_name}': {error.message}")
+        for name in stale:
+            self._invalidate(bucket_name, name)
+
+    def _put_sharded(self, bucket_name, object_name, json_data):
+        """
+        Store a document as '<object_name>.records', its page or segment records as JSON lines,
+        and '<object_name>.index', the remaining top-level fields plus the byte offset and length
+        of every record keyed by its page number or start time. With compression, each record is
+        compressed on its own so that it can still be fetched and decoded by itself.
+
+        The records are written before the index, so a document only becomes visible to readers
+        once it is complete. A plain '<object_name>' from an earlier upload is removed.
+        """
+        field = next(field for field in SHARDED_FIELDS if isinstance(json_data.get(field), list))
+        key_field = SHARDED_FIELDS[field]
+
+        blob = bytearray()
+        offsets = []
+        for record in json_data[field]:
+            encoded = compress_payload(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n", self.compression)
+            offsets.append([record.get(key_field), len(blob), len(encoded)])
+            blob += encoded
+        index = {
+            "header": {key: value for key, value in json_data.items() if key != field},
+            "field": field,
+            "key_field": key_field,
+            "encoding": self.compression,
+            "records": offsets,
+        }
+
+        self.client.put_object(
+            bucket_name, object_name + RECORDS_SUFFIX, BytesIO(bytes(blob)), len(blob),
+            content_type="application/x-ndjson"
+        )
+        self._invalidate(bucket_name, object_name + RECORDS_SUFFIX)
+        self._put_json(bucket_name, object_name + INDEX_SUFFIX, index)
+        self.client.remove_object(bucket_name, object_name)
+        self._invalidate(bucket_name, object_name)
+
+    def get_page(self, bucket_name, file_name, page_number):
+        """
+        Fetch one page of a sharded PDF document ('<file_name>_pdf.json') with a ranged GET.
+
+        Returns:
+            dict: The page record ({"page_number", "content"}), or None if there is no such page.
+
+        Raises:
+            S3Error: If the document is not stored in the sharded layout.
+        """
+        return self._get_record(bucket_name, f"{file_name}_pdf.json", page_number)
+
+    def get_segment(self, bucket_name, file_name, start_time):
+        """
+        Fetch one transcript segment of a sharded audio document ('<file_name>_audio.json') with a ranged GET.
+
+        Returns:
+            dict: The segment record ({"start_time", "end_time", "content"}), or None if there is no such segment.
+
+        Raises:
+            S3Error: If the document is not stored in the sharded layout.
+        """
+        return self._get_record(bucket_name, f"{file_name}_audio.json", start_time)
+
+    def _get_record(self, bucket_name, object_name, key):
+        index = self._read_json(bucket_name, object_name + INDEX_SUFFIX)
+        # Page numbers and start times may have been stored as numbers or strings
+        location = next((record for record in index["records"] if str(record[0]) == str(key)), None)
+        if location is None:
+            return None
+        _, offset, length = location
+        record = self._read_object(bucket_name, object_name + RECORDS_SUFFIX, offset, length)
+        return json.loads(decompress_payload(record, index.get("encoding")).decode('utf-8'))
+
+    def _get_sharded_document(self, bucket_name, object_name):
+        """
+        Reassemble a sharded document into the shape it was uploaded with.
+        """
+        index = self._read_json(bucket_name, object_name + INDEX_SUFFIX)
+        blob = self._read_object(bucket_name, object_name + RECORDS_SUFFIX)
+        records = [
+            json.loads(decompress_payload(blob[offset:offset + length], index.get("encoding")).decode('utf-8'))
+            for _, offset, length in index["records"]
+        ]
+        return {**index["header"], index["field"]: records}
+
     def delete_file_in_bucket(self, bucket_name, file_name):
         """
         Deletes a specific file from a MinIO bucket.
         """
         try:
             self.client.remove_object(bucket_name, file_name)
+            self._invalidate(bucket_name, file_name)
             print(f"File '{file_name}' successfully deleted from bucket '{bucket_name}'")
         except S3Error as e:
             print(f"Error deleting file '{file_name}' from bucket '{bucket_name}': {e}")
@@ -42,11 +370,26 @@ class MinIOClient:
     def get_metadata_from_minio(self, bucket_name, file_name, file_type, page_number=None, start_time=None):
         """
         Retrieves metadata from MinIO.
+
+        Documents stored in the sharded layout are read from it; a single PDF page is then
+        fetched with a ranged GET instead of downloading the whole document.
         """
         metadata_file_name = f"{file_name}_{file_type}.json"
         try:
-            response = self.client.get_object(bucket_name, metadata_file_name)
-            metadata = json.loads(response.read().decode('utf-8'))
+            try:
+                metadata = self._read_json(bucket_name, metadata_file_name)
+            except S3Error as e:
+                if e.code != "NoSuchKey":
+                    raise
+                if file_type == "pdf" and page_number is not None:
+                    page = self.get_page(bucket_name, file_name, page_number)
+                    return page["content"] if page else f"Page {page_number} not found"
+                metadata = self._get_sharded_document(bucket_name, metadata_file_name)
+            if "alias_of" in metadata:
+                # A copy of content processed under another name (see content_dedup.ContentIndex)
+                target = metadata["alias_of"]
+                target_name, target_type = target["object_name"][:-len(".json")].rsplit("_", 1)
+                return self.get_metadata_from_minio(target["bucket"], target_name, target_type, page_number, start_time)
             if file_type == "pdf" and page_number is not None:
                 return next((p["content"] for p in metadata['pages'] if p["page_number"] == page_number), f"Page {page_number} not found")
             elif file_type == "mp3" and start_time is not None:
@@ -58,14 +401,87 @@ class MinIOClient:
             print(f"Error retrieving metadata: {e}")
             return None
         
-    # buckets name : images, audio, pdfs, video    
+    # buckets name : images, audio, pdfs, video
+    def iter_bucket(self, bucket_name, prefix=None, start_after=None, prefetch=8, max_buffered_bytes=256 << 20,
+                    recursive=False):
+        """
+        Stream the objects of a bucket as (object name, parsed JSON) pairs, in listing order.
+
+        The next objects are downloaded concurrently while the caller processes the current
+        one. At most `prefetch` downloads are in flight, and a new one is only started while the
+        listed sizes of all fetched-but-not-yet-consumed objects stay under max_buffered_bytes
+        (a single larger object is still fetched on its own).
+
+        Args:
+            bucket_name (str): The bucket to read.
+            prefix (str): Only objects whose names start with this prefix.
+            start_after (str): Resume after this object name, e.g. the last one processed by
+                an interrupted run. A sharded document named here is yielded once more.
+            prefetch (int): Maximum concurrent downloads.
+            max_buffered_bytes (int): Memory ceiling for prefetched objects.
+            recursive (bool): Also read objects under nested prefixes ('a/b.json'). By default
+                only the top level is read, as list_files_in_bucket always did.
+
+        Yields:
+            tuple: (object name, content). Content is the parsed JSON, the raw text if the
+            object is not valid JSON, or None if it could not be retrieved.
+
+        Raises:
+            S3Error: If the bucket cannot be listed.
+        """
+        objects = self.client.list_objects(bucket_name, prefix=prefix, recursive=recursive, start_after=start_after)
+        in_flight = deque()  # (object name, size, future), in listing order
+        buffered_bytes = 0
+        # Plain objects listed so far whose names are a prefix of the current one. Listing is in
+        # name order, so a plain 'x.json' always comes before its sharded 'x.json.records'.
+        plain_prefixes = []
+
+        with ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="minio-prefetch") as executor:
+            try:
+                for obj in objects:
+                    # Nested prefixes of a non-recursive listing are not objects
+                    if obj.is_dir:
+                        continue
+                    # A sharded document is listed as its index and its records; it is yielded once,
+                    # reassembled, under its plain name when its records come up
+                    if obj.object_name.endswith(INDEX_SUFFIX):
+                        continue
+                    object_name = obj.object_name
+                    while plain_prefixes and not object_name.startswith(plain_prefixes[-1]):
+                        plain_prefixes.pop()
+                    if object_name.endswith(RECORDS_SUFFIX):
+                        object_name = object_name[:-len(RECORDS_SUFFIX)]
+                        # A plain object of the same name was uploaded later (sharded uploads
+                        # remove it) and has already been yielded
+                        if object_name in plain_prefixes:
+                            continue
+                    else:
+                        plain_prefixes.append(object_name)
+                    size = obj.size or 0
+                    # Hand out the oldest objects until the new one fits the ceiling
+                    while in_flight and (len(in_flight) >= prefetch or buffered_bytes + size > max_buffered_bytes):
+                        done_name, done_size, future = in_flight.popleft()
+                        buffered_bytes -= done_size
+                        yield done_name, future.result()
+                    in_flight.append((object_name, size, executor.submit(self._fetch_parsed, bucket_name, obj.object_name)))
+                    buffered_bytes += size
+                while in_flight:
+                    object_name, _, future = in_flight.popleft()
+                    yield object_name, future.result()
+            finally:
+                # The consumer stopped early; do not download what it will never read
+                for _, _, future in in_flight:
+                    future.cancel()
+
     def list_files_in_bucket(self, bucket_name):
         """
         Lists all files (objects) in a given MinIO bucket and returns their contents as a dictionary.
-        
+
+        Holds every object in memory at once; prefer iter_bucket for large buckets.
+
         Args:
             bucket_name (str): The name of the bucket from which to list files.
-        
+
         Returns:
             dict: A dictionary where the keys are object names and the values are their contents.
         """
@@ -73,30 +489,135 @@ class MinIOClient:
             # Check if the bucket exists
             if not self.client.bucket_exists(bucket_name):
                 return f"Bucket '{bucket_name}' does not exist."
+            return dict(self.iter_bucket(bucket_name))
 
-            # List all objects in the bucket
-            objects = self.client.list_objects(bucket_name)
-            file_contents = {}
+        except S3Error as e:
+            print(f"Error listing objects in bucket '{bucket_name}': {e}")
+            return None
 
-            # Iterate through each object and retrieve its content
-            for obj in objects:
-                try:
-                    # Get the object content
-                    response = self.client.get_object(bucket_name, obj.object_name)
-                    content = response.read().decode('utf-8')
-                    
-                    # Parse JSON content and ensure proper handling of Hebrew text
-                    try:
-                        file_contents[obj.object_name] = json.loads(content)
-                    except json.JSONDecodeError:
-                        file_contents[obj.object_name] = content  # In case the file is not valid JSON, return raw content
+    def _fetch_parsed(self, bucket_name, object_name):
+        try:
+            if object_name.endswith(RECORDS_SUFFIX):
+                return self._get_sharded_document(bucket_name, object_name[:-len(RECORDS_SUFFIX)])
+            # Parse JSON content and ensure proper handling of Hebrew text
+            try:
+                return self._read_json(bucket_name, object_name)
+            except json.JSONDecodeError:
+                # In case the file is not valid JSON, return raw content
+                return self._read_object(bucket_name, object_name).decode('utf-8')
+        except S3Error as e:
+            print(f"Error retrieving object '{object_name}': {e}")
+            return None
 
-                except S3Error as e:
-                    print(f"Error retrieving object '{obj.object_name}': {e}")
-                    file_contents[obj.object_name] = None
+    def _read_json(self, bucket_name, object_name):
+        """
+        Download and parse a JSON object. With a cache, the parsed document of an unchanged
+        object is memoized and shared between callers, so it must be treated as read-only.
+        """
+        if self.cache is None:
+            return json.loads(self._read_object(bucket_name, object_name).decode('utf-8'))
+        return self._read_through(bucket_name, object_name, parse=True)
 
-            return file_contents
+    def _read_through(self, bucket_name, object_name, parse=False):
+        """
+        Read a whole object through the cache: trusted within the TTL, otherwise revalidated
+        with a conditional GET on the cached ETag, and downloaded and stored when it changed.
 
-        except S3Error as e:
-            print(f"Error listing objects in bucket '{bucket_name}': {e}")
-            return None
\ No newline at end of file
+        Returns:
+            The object's bytes, or with parse=True its parsed JSON.
+        """
+        cached = self.cache.lookup(bucket_name, object_name)
+        request_headers = None
+        if cached is not None:
+            etag, fresh = cached
+            if fresh:
+                result = self._cached_result(bucket_name, object_name, etag, parse)
+                if result is not None:
+                    return result
+            request_headers = {"If-None-Match": etag}
+
+        try:
+            response = self.client.get_object(bucket_name, object_name, request_headers=request_headers)
+        except ServerError as e:
+            # 304 Not Modified: the cached copy is current
+            if request_headers is None or getattr(e, "status_code", None) != 304:
+                raise
+            self.cache.revalidated(bucket_name, object_name)
+            result = self._cached_result(bucket_name, object_name, etag, parse)
+            if result is not None:
+                return result
+            response = self.client.get_object(bucket_name, object_name)
+
+        try:
+            data = decompress_payload(response.read(decode_content=False), response.headers.get("Content-Encoding"))
+            etag = response.headers.get("ETag")
+        finally:
+            response.close()
+            response.release_conn()
+        self.cache.store(bucket_name, object_name, data, etag)
+        if not parse:
+            return data
+        parsed = json.loads(data.decode('utf-8'))
+        self.cache.put_parsed(bucket_name, object_name, etag, parsed)
+        return parsed
+
+    def _cached_result(self, bucket_name, object_name, etag, parse):
+        if parse:
+            parsed = self.cache.get_parsed(bucket_name, object_name, etag)
+            if parsed is not None:
+                return parsed
+        data = self.cache.read(bucket_name, object_name)
+        if data is None or not parse:
+            return data
+        parsed = json.loads(data.decode('utf-8'))
+        self.cache.put_parsed(bucket_name, object_name, etag, parsed)
+        return parsed
+
+    def _invalidate(self, bucket_name, object_name):
+        if self.cache is not None:
+            self.cache.invalidate(bucket_name, object_name)
+
+    def _read_object(self, bucket_name, object_name, offset=0, length=0):
+        """
+        Download an object, or `length` bytes of it from `offset`, and return the bytes,
+        returning the connection to the pool. Whole objects stored with a Content-Encoding
+        are decompressed, and read through the cache if there is one.
+        """
+        if self.cache is not None and not (offset or length):
+            return self._read_through(bucket_name, object_name)
+        response = self.client.get_object(bucket_name, object_name, offset=offset, length=length)
+        try:
+            # Read the stored bytes; urllib3 would otherwise try to decode gzip itself
+            data = response.read(decode_content=False)
+            if offset or length:
+                return data
+            return decompress_payload(data, response.headers.get("Content-Encoding"))
+        finally:
+            response.close()
+            response.release_conn()
+
+
+# how to use :
+#     minio_client = get_shared_client()
+
+#     Upload many documents concurrently:
+#       documents = ((f"{name}_pdf.json", build_metadata(name)) for name in names)
+#       result = minio_client.upload_many("pdfs", documents)
+#       for object_name, error in result["failed"].items():
+#           print(f"{object_name}: {error}")
+
+#     Stream a bucket without loading it all, resuming after the last processed object:
+#       for object_name, document in minio_client.iter_bucket("pdfs", start_after=last_done):
+#           process(document)
+
+#     Store a PDF in the sharded layout and read back a single page with a ranged GET:
+#       minio_client.upload_json_to_minio("pdfs", "clean_document_heb_pdf.json", pdf_metadata, sharded=True)
+#       page = minio_client.get_page("pdfs", "clean_document_heb", 3)
+#     If the buckets hold sharded documents, let plain re-uploads of them delete the sharded copy:
+#       minio_client = MinIOClient(sharded_layout=True)   # or set MINIO_SHARDED_LAYOUT=true
+
+#     Compress uploads (reads of old uncompressed objects keep working):
+#       minio_client = MinIOClient(compression="zstd")   # or set MINIO_COMPRESSION=zstd
+
+#     Serve repeat reads from a local cache, revalidated by ETag once entries are older than a minute:
+#       minio_client = MinIOClient(cache=ObjectCache(ttl_seconds=60))   # or set MINIO_OBJECT_CACHE=true
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import atexit
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class ObjectCache:
+    """
+    Read-through cache of MinIO objects for MinIOClient.
+
+    The disk tier keeps object bodies (already decompressed) as files, with a JSON index of
+    their ETags, sizes and when they were last validated; when it grows past max_disk_bytes the
+    least recently used objects are deleted. Entries validated within ttl_seconds are served
+    without contacting MinIO, older ones are revalidated with a conditional GET on their ETag.
+    The memory tier memoizes parsed JSON of hot objects, keyed by ETag so a changed object is
+    never served from it. The index is written every flush_every changes or
+    flush_interval_seconds, and on close() or exit, rather than on every store.
+    """
+
+    INDEX_FILE = "index.json"
+    OBJECTS_DIR = "objects"
+
+    def __init__(self, cache_dir=None, max_disk_bytes=1 << 30, ttl_seconds=60.0, memory_entries=256,
+                 flush_every=1000, flush_interval_seconds=30.0):
+        """
+        Args:
+            cache_dir (str): Directory of the disk tier. Defaults to $OBJECT_CACHE_DIR or
+                ~/.cache/my_project/objects.
+            max_disk_bytes (int): Size cap of the cached object bodies.
+            ttl_seconds (float): How long an entry is trusted without revalidation. 0 revalidates
+                every read; None trusts entries until they are evicted or invalidated.
+            memory_entries (int): Maximum number of parsed JSON documents held in memory.
+            flush_every (int): Number of index changes after which the index is rewritten.
+            flush_interval_seconds (float): Maximum age of unflushed index changes, checked on change.
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv(
+                "OBJECT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "my_project", "objects")
+            )
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.flush_every = flush_every
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._index = OrderedDict()  # key -> {"etag", "size", "validated_at"}, least recently used first
+        self._parsed = OrderedDict()  # key -> (etag, parsed JSON)
+        self._disk_bytes = 0
+        self._dirty = False
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        # Serializes index writes, so an older snapshot never replaces a newer one
+        self._flush_lock = threading.Lock()
+
+        self.fresh_hits = 0
+        self.revalidated_hits = 0
+        self.parsed_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.join(self.cache_dir, self.OBJECTS_DIR), exist_ok=True)
+        self._load_index()
+        atexit.register(self.close)
+
+    @staticmethod
+    def make_key(bucket_name, object_name):
+        return f"{bucket_name}/{object_name}"
+
+    def lookup(self, bucket_name, object_name):
+        """
+        Returns:
+            tuple: (etag, fresh) of the cached object, fresh meaning it is within the TTL and can
+            be used without revalidation, or None when the object is not cached.
+        """
+        key = self.make_key(bucket_name, object_name)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self._dirty = True
+            fresh = self.ttl_seconds is None or time.time() - entry["validated_at"] <= self.ttl_seconds
+            if fresh:
+                self.fresh_hits += 1
+            return entry["etag"], fresh
+
+    def read(self, bucket_name, object_name):
+        """
+        Returns:
+            bytes: The cached body, or None if its file has gone missing.
+        """
+        try:
+            with open(self._path(self.make_key(bucket_name, object_name)), "rb") as file:
+                return file.read()
+        except OSError:
+            self.invalidate(bucket_name, object_name)
+            return None
+
+    def revalidated(self, bucket_name, object_name):
+        """
+        Record that MinIO confirmed the cached ETag is still current (a 304 response).
+        """
+        key = self.make_key(bucket_name, object_name)
+        with self._lock:
+            if key in self._index:
+                self._index[key]["validated_at"] = time.time()
+                self.revalidated_hits += 1
+                self._changed()
+        self._maybe_flush()
+
+    def store(self, bucket_name, object_name, data, etag):
+        """
+        Cache an object body under its ETag, evicting least recently used objects to stay
+        within max_disk_bytes.
+        """
+        if len(data) > self.max_disk_bytes:
+            return
+        key = self.make_key(bucket_name, object_name)
+        path = self._path(key)
+        # A unique temporary name, since prefetch threads may store the same key at once
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as file:
+            file.write(data)
+        os.replace(file.name, path)
+
+        with self._lock:
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self._disk_bytes -= previous["size"]
+            self._parsed.pop(key, None)
+            self._index[key] = {"etag": etag, "size": len(data), "validated_at": time.time()}
+            self._disk_bytes += len(data)
+            while self._disk_bytes > self.max_disk_bytes:
+                evicted_key, evicted = self._index.popitem(last=False)
+                self._disk_bytes -= evicted["size"]
+                self._parsed.pop(evicted_key, None)
+                self._remove_file(evicted_key)
+            self._changed()
+        self._maybe_flush()
+
+    def get_parsed(self, bucket_name, object_name, etag):
+        """
+        Returns:
+            The memoized parsed JSON of the object at this ETag, or None. Shared between callers,
+            so it must be treated as read-only.
+        """
+        key = self.make_key(bucket_name, object_name)
+        with self._lock:
+            memo = self._parsed.get(key)
+            if memo is None or memo[0] != etag:
+                return None
+            self._parsed.move_to_end(key)
+            self.parsed_hits += 1
+            return memo[1]
+
+    def put_parsed(self, bucket_name, object_name, etag, parsed):
+        key = self.make_key(bucket_name, object_name)
+        with self._lock:
+            self._parsed[key] = (etag, parsed)
+            self._parsed.move_to_end(key)
+            while len(self._parsed) > self.memory_entries:
+                self._parsed.popitem(last=False)
+
+    def invalidate(self, bucket_name, object_name):
+        """
+        Forget an object, e.g. after this process overwrote or deleted it.
+        """
+        key = self.make_key(bucket_name, object_name)
+        with self._lock:
+            entry = self._index.pop(key, None)
+            self._parsed.pop(key, None)
+            if entry is None:
+                return
+            self._disk_bytes -= entry["size"]
+            self._remove_file(key)
+            self._changed()
+        self._maybe_flush()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss counters and current tier sizes.
+        """
+        with self._lock:
+            hits = self.fresh_hits + self.revalidated_hits
+            lookups = hits + self.misses
+            return {
+                "fresh_hits": self.fresh_hits,
+                "revalidated_hits": self.revalidated_hits,
+                "parsed_hits": self.parsed_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "disk_entries": len(self._index),
+                "disk_bytes": self._disk_bytes,
+                "parsed_entries": len(self._parsed),
+            }
+
+    def flush(self):
+        """
+        Write the disk index, including the current LRU order.
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._pending = 0
+                self._last_flush = time.monotonic()
+                if not self._dirty:
+                    return
+                entries = list(self._index.items())
+                self._dirty = False
+            with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".tmp", delete=False, encoding="utf-8") as file:
+                json.dump({"entries": entries}, file)
+            os.replace(file.name, os.path.join(self.cache_dir, self.INDEX_FILE))
+
+    def close(self):
+        """
+        Persist pending index changes. Also runs at interpreter exit.
+        """
+        self.flush()
+
+    def clear(self):
+        """
+        Drop every cached object from both tiers.
+        """
+        with self._lock:
+            for key in self._index:
+                self._remove_file(key)
+            self._index.clear()
+            self._parsed.clear()
+            self._disk_bytes = 0
+            self._dirty = True
+        self.flush()
+
+    def _changed(self):
+        # Called with self._lock held
+        self._dirty = True
+        self._pending += 1
+
+    def _maybe_flush(self):
+        with self._lock:
+            due = self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval_seconds
+        if due:
+            self.flush()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, self.OBJECTS_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def _remove_file(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        try:
+            with open(index_path, "r", encoding="utf-8") as file:
+                entries = json.load(file)["entries"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable object cache at '{self.cache_dir}': {e}")
+            return
+        # Objects whose body file is gone (e.g. cleaned up by hand) are dropped
+        self._index = OrderedDict((key, entry) for key, entry in entries if os.path.exists(self._path(key)))
+        self._disk_bytes = sum(entry["size"] for entry in self._index.values())
@@ -0,0 +1,202 @@
+import os
+import time
+import shutil
+import tempfile
+
+import numpy as np
+
+
+class OnnxEmbeddingBackend:
+    def __init__(self, model_name='BAAI/bge-m3', model_dir=None, quantize=True, num_threads=None):
+        """
+        Dense-vector encoder running an ONNX export of the model through ONNX Runtime on CPU.
+
+        The model is exported (and, with quantize=True, dynamically quantized to int8) the first
+        time it is needed and reused from model_dir afterwards.
+
+        Args:
+            model_name (str): Hugging Face name of the model.
+            model_dir (str): Where the exported model is kept. Defaults to $ONNX_MODEL_DIR or
+                ~/.cache/my_project/onnx/<model name>.
+            quantize (bool): Run the int8 dynamically quantized model instead of the float32 export.
+            num_threads (int): ONNX Runtime intra-op threads. Defaults to ONNX Runtime's choice.
+        """
+        if model_dir is None:
+            model_dir = os.path.join(
+                os.getenv("ONNX_MODEL_DIR", os.path.join(os.path.expanduser("~"), ".cache", "my_project", "onnx")),
+                model_name.replace("/", "__"),
+            )
+        self.model_name = model_name
+        self.model_dir = model_dir
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.fp32_path = os.path.join(model_dir, "model.onnx")
+        self.int8_path = os.path.join(model_dir, "model.int8.onnx")
+        self._session = None
+        self._tokenizer = None
+
+    @property
+    def model_path(self):
+        return self.int8_path if self.quantize else self.fp32_path
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
+
+    @property
+    def session(self):
+        if self._session is None:
+            import onnxruntime as ort
+
+            self.export()
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.num_threads:
+                options.intra_op_num_threads = self.num_threads
+            self._session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        return self._session
+
+    def export(self):
+        """
+        Export the model to ONNX and quantize it, unless that was already done.
+        """
+        if not os.path.exists(self.fp32_path):
+            self._build_atomically(self.fp32_path, self._export_fp32)
+        if self.quantize and not os.path.exists(self.int8_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            self._build_atomically(self.int8_path, lambda path: quantize_dynamic(
+                self.fp32_path, path, weight_type=QuantType.QInt8, use_external_data_format=True
+            ))
+
+    def _build_atomically(self, final_path, build):
+        """
+        Run build(path) for a path in a temporary directory inside model_dir, then move what it
+        wrote into model_dir with os.replace, the model file last. An export or quantization
+        that dies partway thus never leaves a truncated model that export() would take as done.
+        External data files keep their names, so the model's relative references stay valid.
+        """
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.model_dir, prefix=".tmp-")
+        name = os.path.basename(final_path)
+        try:
+            build(os.path.join(tmp_dir, name))
+            for entry in os.listdir(tmp_dir):
+                if entry != name:
+                    os.replace(os.path.join(tmp_dir, entry), os.path.join(self.model_dir, entry))
+            os.replace(os.path.join(tmp_dir, name), final_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _export_fp32(self, path):
+        import torch
+        from transformers import AutoModel
+
+        class DenseHead(torch.nn.Module):
+            # BGE-M3 dense vectors are the normalized [CLS] hidden state
+            def __init__(self, encoder):
+                super().__init__()
+                self.encoder = encoder
+
+            def forward(self, input_ids, attention_mask):
+                hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+                return torch.nn.functional.normalize(hidden[:, 0], dim=-1)
+
+        model = DenseHead(AutoModel.from_pretrained(self.model_name)).eval()
+        sample = self.tokenizer(["export sample"], return_tensors="pt")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"]),
+                path,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["dense_vecs"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "dense_vecs": {0: "batch"},
+                },
+                opset_version=17,
+            )
+
+    def encode(self, texts, max_length=8192):
+        """
+        Encode one batch of texts.
+
+        Returns:
+            numpy.ndarray: float32 dense vectors of shape (len(texts), dim).
+        """
+        inputs = self.tokenizer(
+            list(texts), padding=True, truncation=True, max_length=max_length, return_tensors="np"
+        )
+        (dense_vecs,) = self.session.run(
+            ["dense_vecs"],
+            {"input_ids": inputs["input_ids"].astype(np.int64), "attention_mask": inputs["attention_mask"].astype(np.int64)},
+        )
+        return dense_vecs.astype(np.float32, copy=False)
+
+
+def check_parity(texts, threshold=0.99, reference='torch', candidate='onnx'):
+    """
+    Compare the vectors of two EmbeddingModule backends on the same texts.
+
+    Args:
+        texts (list[str]): Texts to embed with both backends.
+        threshold (float): Minimum cosine similarity every text must reach.
+        reference (str): Backend treated as ground truth.
+        candidate (str): Backend being checked.
+
+    Returns:
+        dict: 'passed', and the 'min' and 'mean' cosine similarity across texts.
+    """
+    from embedding_module import EmbeddingModule
+
+    expected = EmbeddingModule(use_gpu=False, backend=reference).get_embeddings(texts)
+    actual = EmbeddingModule(use_gpu=False, backend=candidate).get_embeddings(texts)
+
+    cosine = np.sum(expected * actual, axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    return {"passed": bool(cosine.min() >= threshold), "min": float(cosine.min()), "mean": float(cosine.mean())}
+
+
+def benchmark_backends(texts, backends=('torch', 'onnx'), repeats=3):
+    """
+    Measure embedding throughput of each backend on this host.
+
+    Each backend is warmed up once (model load, export) before timing.
+
+    Returns:
+        dict: Backend name to texts per second (best of `repeats` runs).
+    """
+    from embedding_module import EmbeddingModule
+
+    results = {}
+    for backend in backends:
+        embedder = EmbeddingModule(use_gpu=False, backend=backend)
+        embedder.get_embeddings(texts[:1])
+        best = float("inf")
+        for _ in range(repeats):
+            start_time = time.time()
+            embedder.get_embeddings(texts)
+            best = min(best, time.time() - start_time)
+        results[backend] = len(texts) / best
+    return results
+
+
+if __name__ == "__main__":
+    sample_texts = [
+        "Call me Ishmael.",
+        "Some years ago, never mind how long precisely, having little or no money in my purse, I thought I would sail about a little.",
+        "ראובן תחרות אכילת לאפות אתה נגד ערן לוי מי לוקח דווקא כבר",
+        "סיפורים קצרים מלאי מסרים לכל גיל וזמן ולמרחב המוגן",
+    ] * 16
+
+    parity = check_parity(sample_texts)
+    print(f"Parity torch vs onnx-int8: passed={parity['passed']} min={parity['min']:.4f} mean={parity['mean']:.4f}")
+
+    for backend, texts_per_second in benchmark_backends(sample_texts).items():
+        print(f"{backend}: {texts_per_second:.1f} texts/s")
@@ -1,11 +1,14 @@
 import os
 import time
 from PyPDF2 import PdfReader
-from minio_client import MinIOClient
+from minio_client import get_shared_client
+from content_dedup import ContentIndex
 
 class PDFTextExtractorUploader:
-    def __init__(self):
-        self.minio_client = MinIOClient()
+    def __init__(self, content_index=None):
+        self.minio_client = get_shared_client()
+        # Copies of an already processed PDF are not parsed again, only aliased
+        self.content_index = content_index or ContentIndex(self.minio_client)
 
     def extract_text_from_pdf(self, pdf_path):
         with open(pdf_path, 'rb') as file:
@@ -16,14 +19,12 @@ class PDFTextExtractorUploader:
 
     def upload_pdf_metadata(self, pdf_path):
         file_name_without_extension = os.path.basename(pdf_path)[:-4]
-        pages_content = self.extract_text_from_pdf(pdf_path)
-        pdf_metadata = {
+        object_name = f"{file_name_without_extension}_pdf.json"
+        return self.content_index.upload_once(pdf_path, "pdfs", object_name, lambda: {
             "file_name": file_name_without_extension,
             "type": "pdf",
-            "pages": pages_content
-        }
-        object_name = f"{file_name_without_extension}_pdf.json"
-        self.minio_client.upload_json_to_minio("pdfs", object_name, pdf_metadata)
+            "pages": self.extract_text_from_pdf(pdf_path)
+        })
 
     def run(self, pdf_path):
         start_time = time.time()
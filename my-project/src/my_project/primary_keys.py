@@ -0,0 +1,37 @@
+import json
+import hashlib
+
+
+def segment_key(item):
+    """
+    Identify a chunk within its file.
+
+    Chunks from TextChunker are identified by their chunk index; other items (such as the
+    line-per-row Moby Dick example) by their position metadata.
+
+    Args:
+        item (dict): An item as passed to insert.
+
+    Returns:
+        str: A key that is stable across re-ingestion of the same content layout.
+    """
+    if "chunk_index" in item:
+        return str(item["chunk_index"])
+    position = {k: v for k, v in item.items() if k not in ["type", "file", "text"]}
+    return json.dumps(position, sort_keys=True, ensure_ascii=False)
+
+
+def make_primary_key(file, segment):
+    """
+    Deterministic 63-bit primary key for (file, segment), so re-inserting a chunk addresses
+    the same row instead of creating a new one.
+
+    Returns:
+        int: A non-negative value that fits Milvus' INT64 primary key.
+    """
+    digest = hashlib.sha1(f"{file}\x00{segment}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") & ((1 << 63) - 1)
+
+
+def item_primary_key(item):
+    return make_primary_key(item["file"], segment_key(item))
@@ -0,0 +1,120 @@
+import copy
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from embedding_cache import normalize_text
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of search results with a time-to-live.
+
+    Keys include a generation counter for every collection the search touched. Writers call
+    invalidate(collection) after inserting, upserting, deleting or dropping, which bumps that
+    counter, so entries computed against older data are never served again and simply age out
+    of the LRU. Counters are per process; the TTL bounds staleness from writes made elsewhere.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=300.0):
+        """
+        Args:
+            max_entries (int): Maximum number of cached result lists.
+            ttl_seconds (float): Age after which an entry is no longer served. None disables expiry.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()  # key -> (stored_at, compute_ms, results)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.saved_ms = 0.0
+
+    def make_key(self, kind, query, top_k, collection_names, filters=None, expr=None, **params):
+        """
+        Build the cache key of one search.
+
+        Args:
+            kind (str): The search method, e.g. 'similarity' or 'hybrid'.
+            query (str): The query text; normalized like embedding cache keys.
+            top_k (int): Number of results requested.
+            collection_names (list[str]): The collections the search runs against.
+            filters (dict): Search filters, as passed to the search method.
+            expr (str): Raw filter expression.
+            params: Any other argument that changes the results, e.g. rrf_k.
+
+        Returns:
+            str: The key.
+        """
+        with self._lock:
+            generations = [[name, self._generations.get(name, 0)] for name in sorted(collection_names)]
+        return json.dumps(
+            [kind, normalize_text(query), top_k, generations, filters or {}, expr or "", params],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+
+    def get(self, key):
+        """
+        Returns:
+            list: A copy of the cached results, or None if the key is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_ms += entry[1]
+        # Callers may annotate their results; keep the cached copy intact
+        return copy.deepcopy(entry[2])
+
+    def put(self, key, results, compute_ms):
+        """
+        Args:
+            key (str): From make_key.
+            results (list): The search results.
+            compute_ms (float): How long the search took, credited to saved_ms on every hit.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), compute_ms, copy.deepcopy(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, collection_name):
+        """
+        Bump the generation of a collection so that no earlier result involving it is served.
+        """
+        with self._lock:
+            self._generations[collection_name] = self._generations.get(collection_name, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss counters, hit rate, total and mean search latency saved by hits, and size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_ms": self.saved_ms,
+                "saved_ms_per_hit": self.saved_ms / self.hits if self.hits else 0.0,
+                "entries": len(self._entries),
+            }
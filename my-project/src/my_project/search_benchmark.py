@@ -0,0 +1,56 @@
+import time
+
+from milvus_module import MilvusDB
+
+
+def measure_qps(milvus, queries, top_k=5, batch_size=32):
+    """
+    Compare the throughput of one-query-at-a-time search with batch search.
+
+    Args:
+        milvus (MilvusDB): A connected MilvusDB with populated collections.
+        queries (list[str]): The queries to run through both paths.
+        top_k (int): Number of results per query.
+        batch_size (int): Number of queries per batch_similarity_search call.
+
+    Returns:
+        dict: Queries per second of the 'single' and 'batch' paths.
+    """
+    # Load collections and the model first so neither path pays for it
+    milvus.warm_up()
+    milvus.similarity_search(queries[0], top_k=top_k)
+
+    start_time = time.time()
+    for query in queries:
+        milvus.similarity_search(query, top_k=top_k)
+    single_seconds = time.time() - start_time
+
+    start_time = time.time()
+    for start in range(0, len(queries), batch_size):
+        milvus.batch_similarity_search(queries[start:start + batch_size], top_k=top_k)
+    batch_seconds = time.time() - start_time
+
+    return {"single": len(queries) / single_seconds, "batch": len(queries) / batch_seconds}
+
+
+if __name__ == "__main__":
+    sample_queries = [
+        "Call me Ishmael",
+        "the white whale",
+        "Captain Ahab's leg",
+        "harpoon",
+        "the sea and the ship",
+        "Queequeg's coffin",
+        "סיפורים קצרים",
+        "כדורגל",
+    ] * 8
+
+    milvus = MilvusDB()
+    # Repeated queries would otherwise come from the embedding and query caches; make both paths embed
+    # and search every query
+    milvus.embedder.cache = None
+    milvus.query_cache = None
+    qps = measure_qps(milvus, sample_queries)
+    print(f"Single-query path: {qps['single']:.1f} queries/s")
+    print(f"Batch path: {qps['batch']:.1f} queries/s")
+    milvus.disconnect()
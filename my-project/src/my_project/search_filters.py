@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+
+# Scalar columns stored next to each vector, and the value used when an item has no such position
+SCALAR_DEFAULTS = {
+    "media_type": "",
+    "page": -1,
+    "start_seconds": -1.0,
+    "end_seconds": -1.0,
+}
+
+
+def scalar_fields(item):
+    """
+    Extract the filterable scalar values of an item produced by TextChunker.
+
+    Args:
+        item (dict): An item with 'type', 'file', 'text' and optional position fields.
+
+    Returns:
+        dict: media_type, page, start_seconds and end_seconds, with SCALAR_DEFAULTS for missing ones.
+    """
+    return {
+        "media_type": str(item.get("media_type") or item.get("type") or SCALAR_DEFAULTS["media_type"]),
+        "page": int(item.get("page", SCALAR_DEFAULTS["page"])),
+        "start_seconds": float(item.get("start_time", SCALAR_DEFAULTS["start_seconds"])),
+        "end_seconds": float(item.get("end_time", SCALAR_DEFAULTS["end_seconds"])),
+    }
+
+
+def build_filter_expr(file=None, media_type=None, page=None, page_range=None, time_range=None):
+    """
+    Build a Milvus boolean expression from search filters.
+
+    Args:
+        file (str | list[str]): Only chunks of this file (or these files). The file field is the
+            partition key, so this prunes partitions before the vector search.
+        media_type (str | list[str]): Only chunks of this media type, e.g. 'pdf', 'audio', 'png'.
+        page (int): Only chunks of this page.
+        page_range (tuple): (first, last) page, inclusive.
+        time_range (tuple): (start, end) in seconds; keeps segments that overlap it.
+
+    Returns:
+        str: The expression, or an empty string when no filter is given.
+    """
+    clauses = []
+    for field, value in (("file", file), ("media_type", media_type)):
+        if isinstance(value, (list, tuple, set)):
+            clauses.append(f"{field} in {json.dumps(list(value), ensure_ascii=False)}")
+        elif value is not None:
+            clauses.append(f"{field} == {json.dumps(value, ensure_ascii=False)}")
+    if page is not None:
+        clauses.append(f"page == {int(page)}")
+    if page_range is not None:
+        clauses.append(f"page >= {int(page_range[0])} and page <= {int(page_range[1])}")
+    if time_range is not None:
+        clauses.append(f"end_seconds >= {float(time_range[0])} and start_seconds <= {float(time_range[1])}")
+    return " and ".join(f"({clause})" for clause in clauses)
+
+
+def combine_exprs(*exprs):
+    """
+    AND together the non-empty expressions.
+    """
+    return " and ".join(f"({expr})" for expr in exprs if expr)
+
+
+def filter_mask(columns, file=None, media_type=None, page=None, page_range=None, time_range=None):
+    """
+    Evaluate the filters of build_filter_expr against in-memory columns, for stores without
+    a query language (see local_vector_store.py).
+
+    Args:
+        columns (dict): numpy arrays for 'file', 'media_type', 'page', 'start_seconds', 'end_seconds'.
+        file, media_type, page, page_range, time_range: As in build_filter_expr.
+
+    Returns:
+        numpy.ndarray: Boolean mask of the rows that pass every filter.
+    """
+    mask = np.ones(len(columns["file"]), dtype=bool)
+    for field, value in (("file", file), ("media_type", media_type)):
+        if isinstance(value, (list, tuple, set)):
+            mask &= np.isin(columns[field], list(value))
+        elif value is not None:
+            mask &= columns[field] == value
+    if page is not None:
+        mask &= columns["page"] == int(page)
+    if page_range is not None:
+        mask &= (columns["page"] >= int(page_range[0])) & (columns["page"] <= int(page_range[1]))
+    if time_range is not None:
+        mask &= (columns["end_seconds"] >= float(time_range[0])) & (columns["start_seconds"] <= float(time_range[1]))
+    return mask
@@ -0,0 +1,204 @@
+import re
+
+# Sentence ends: Latin/Hebrew terminal punctuation (including the Hebrew sof pasuq) followed by
+# whitespace, or a line break. OCR and PDF text uses line breaks as the only separator quite often.
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…׃])\s+|\s*\n+\s*")
+
+# Byte limit of the chunk text stored with each vector; TextChunker chunks stay well below it
+TEXT_MAX_BYTES = 8192
+
+
+def truncate_utf8(text, max_bytes=TEXT_MAX_BYTES):
+    """
+    Cut text to at most max_bytes of UTF-8 without splitting a character.
+    """
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
+
+
+def split_sentences(text):
+    """
+    Split Hebrew or English text into sentences.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list[str]: The non-empty sentences, in order.
+    """
+    return [sentence.strip() for sentence in SENTENCE_BOUNDARY.split(text or "") if sentence.strip()]
+
+
+class TextChunker:
+    def __init__(self, embedder, max_tokens=512, overlap_tokens=64):
+        """
+        Split parsed documents into token-bounded chunks ready for MilvusDB.insert.
+
+        Args:
+            embedder (EmbeddingModule): Used for its tokenizer, so windows are measured in model tokens.
+            max_tokens (int): Maximum number of tokens per chunk.
+            overlap_tokens (int): Number of tokens from the end of a chunk repeated at the start of the next.
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens.")
+        self.embedder = embedder
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def chunk_text(self, text):
+        """
+        Split text into overlapping windows of whole sentences.
+
+        Args:
+            text (str): The text to chunk.
+
+        Returns:
+            list[str]: The chunks, in order.
+        """
+        return [chunk for chunk, _ in self._chunk_units([(sentence, None) for sentence in split_sentences(text)])]
+
+    def chunk_document(self, document, file_name=None):
+        """
+        Chunk a parsed document in one of the JSON shapes the uploaders store in MinIO.
+
+        PDFs ('pages') are chunked page by page and every chunk carries its page number.
+        Transcripts ('transcription') are chunked across segments and every chunk carries the
+        start and end time of the segments it covers. Images ('content') carry no position.
+
+        Args:
+            document (dict): The parsed document as stored in MinIO.
+            file_name (str): Value for the 'file' field. Defaults to the document's 'file_name'.
+
+        Returns:
+            list[dict]: Items with 'type', 'file', 'text', 'chunk_index', 'media_type' and provenance fields.
+        """
+        file_name = file_name or document.get("file_name")
+        items = []
+
+        if "pages" in document:
+            for page in document["pages"]:
+                for chunk, _ in self._chunk_units(self._units(page.get("content"))):
+                    items.append({"type": "document", "page": page["page_number"], "text": chunk})
+
+        elif "transcription" in document:
+            units = []
+            for segment in document["transcription"]:
+                units.extend(self._units(segment.get("content"), (segment["start_time"], segment["end_time"])))
+            for chunk, segments in self._chunk_units(units):
+                items.append({
+                    "type": "audio",
+                    "start_time": segments[0][0],
+                    "end_time": segments[-1][1],
+                    "text": chunk
+                })
+
+        elif "content" in document:
+            for chunk, _ in self._chunk_units(self._units(document["content"])):
+                items.append({"type": "image", "text": chunk})
+
+        for chunk_index, item in enumerate(items):
+            item["file"] = file_name
+            item["chunk_index"] = chunk_index
+            # The uploaders record the source format ('pdf', 'audio', 'png', ...) under 'type'
+            if document.get("type"):
+                item["media_type"] = document["type"]
+        return items
+
+    @staticmethod
+    def _units(text, source=None):
+        return [(sentence, source) for sentence in split_sentences(text)]
+
+    def _chunk_units(self, units):
+        """
+        Greedily pack (sentence, source) units into windows of at most max_tokens.
+
+        Returns:
+            list[tuple]: (chunk text, sources of the units in the chunk) pairs.
+        """
+        if not units:
+            return []
+        units, lengths = self._split_long_units(units)
+
+        chunks = []
+        window = []
+        window_tokens = 0
+        for unit, length in zip(units, lengths):
+            if window and window_tokens + length > self.max_tokens:
+                chunks.append(self._join(window))
+                window, window_tokens = self._overlap(window)
+                # The carried overlap must leave room for the new unit
+                while window and window_tokens + length > self.max_tokens:
+                    window_tokens -= window.pop(0)[1]
+            window.append((unit, length))
+            window_tokens += length
+        chunks.append(self._join(window))
+        return chunks
+
+    def _overlap(self, window):
+        """
+        Return the trailing units of a finished window that fit in overlap_tokens.
+        """
+        carried = []
+        carried_tokens = 0
+        for unit, length in reversed(window):
+            if carried_tokens + length > self.overlap_tokens:
+                break
+            carried.insert(0, (unit, length))
+            carried_tokens += length
+        return carried, carried_tokens
+
+    def _split_long_units(self, units):
+        """
+        Count the tokens of each unit and break sentences longer than max_tokens into runs of words,
+        or of characters where a single word is still too long (URLs, base64, unspaced CJK text).
+
+        Returns:
+            tuple: (units, token counts) after splitting.
+        """
+        lengths = self._count([text for text, _ in units])
+        result_units = []
+        result_lengths = []
+        for (text, source), length in zip(units, lengths):
+            for piece, piece_length in self._split_long_text(text, length):
+                result_units.append((piece, source))
+                result_lengths.append(piece_length)
+        return result_units, result_lengths
+
+    def _split_long_text(self, text, length):
+        """
+        Split text of `length` tokens until every piece fits in max_tokens.
+
+        Returns:
+            list[tuple]: (piece, token count) pairs, in order.
+        """
+        if length <= self.max_tokens or len(text) <= 1:
+            return [(text, length)]
+        words = text.split()
+        parts = words if len(words) > 1 else list(text)
+        separator = " " if len(words) > 1 else ""
+        # Estimate parts per window from the text's average tokens per part, with some headroom
+        parts_per_chunk = max(1, int(self.max_tokens * len(parts) / length * 0.9))
+        pieces = [separator.join(parts[start:start + parts_per_chunk]) for start in range(0, len(parts), parts_per_chunk)]
+        result = []
+        for piece, piece_length in zip(pieces, self._count(pieces)):
+            result.extend(self._split_long_text(piece, piece_length))
+        return result
+
+    def _count(self, texts):
+        return self.embedder.count_tokens(texts, max_length=None, add_special_tokens=False)
+
+    @staticmethod
+    def _join(window):
+        return " ".join(text for (text, _), _ in window), [source for (_, source), _ in window]
+
+
+# how to use :
+#     embedder = EmbeddingModule()
+#     chunker = TextChunker(embedder, max_tokens=512, overlap_tokens=64)
+#     document = minio_client.list_files_in_bucket("pdfs")["clean_document_heb_pdf.json"]
+#     milvus.insert(chunker.chunk_document(document))
+
+# each item looks like
+#    {"type": "document", "page": 3, "text": "...", "file": "clean_document_heb", "chunk_index": 7, "media_type": "pdf"}
@@ -0,0 +1,72 @@
+import numpy as np
+from pymilvus import connections
+
+from index_benchmark import make_corpus, exact_top_k, benchmark_index
+from index_config import choose_index
+
+
+def bytes_per_vector(dim, storage):
+    """
+    Memory one vector takes in a loaded collection, without graph or list overhead.
+
+    Args:
+        dim (int): Vector dimension.
+        storage (str): 'float32', 'float16' or 'sq8' (IVF_SQ8, one byte per component).
+
+    Returns:
+        int: Bytes per vector.
+    """
+    return dim * {"float32": 4, "float16": 2, "sq8": 1}[storage]
+
+
+def float16_round_trip(vectors):
+    return vectors.astype(np.float16).astype(np.float32)
+
+
+def sq8_round_trip(vectors):
+    """
+    Encode and decode vectors the way IVF_SQ8 stores them: every component is mapped to one of
+    256 levels spanning that dimension's min..max over the corpus.
+    """
+    low = vectors.min(axis=0)
+    scale = (vectors.max(axis=0) - low) / 255
+    scale[scale == 0] = 1
+    codes = np.round((vectors - low) / scale).astype(np.uint8)
+    return low + codes.astype(np.float32) * scale
+
+
+def compression_recall(corpus, queries, truth, round_trip, top_k=10):
+    """
+    Recall@k of exact search over the compressed corpus against exact float32 search, which
+    isolates the loss caused by the storage format from the loss of any ANN index.
+    """
+    found = exact_top_k(round_trip(corpus), queries, top_k)
+    return float(np.mean([len(set(a) & set(b)) / top_k for a, b in zip(found, truth)]))
+
+
+if __name__ == "__main__":
+    num_rows, num_queries, dim, top_k = 100_000, 500, 1024, 10
+    corpus, queries = make_corpus(num_rows, num_queries, dim=dim)
+    truth = exact_top_k(corpus, queries, top_k)
+
+    print(f"{num_rows} vectors, dim {dim}, {num_queries} queries, top {top_k}")
+    print("Storage format alone (exact search over the decoded vectors):")
+    for storage, round_trip in (("float32", lambda v: v), ("float16", float16_round_trip), ("sq8", sq8_round_trip)):
+        recall = compression_recall(corpus, queries, truth, round_trip, top_k=top_k)
+        megabytes = bytes_per_vector(dim, storage) * 1_000_000 / 2 ** 20
+        print(f"  {storage:<8} {megabytes:8.0f} MB per million vectors  recall@{top_k}={recall:.3f}")
+
+    # The same formats as Milvus indexes, including index overhead in the latency numbers
+    connections.connect("default", host="localhost", port="19530")
+    candidates = [
+        ("float32", "float32", choose_index(num_rows, dim=dim)),
+        ("float16", "float16", choose_index(num_rows, dim=dim)),
+        ("float32", "sq8", choose_index(num_rows, dim=dim, quantize=True)),
+    ]
+    print("Milvus:")
+    for vector_dtype, storage, index_params in candidates:
+        result = benchmark_index(index_params, corpus, queries, truth, top_k=top_k, vector_dtype=vector_dtype)
+        megabytes = bytes_per_vector(dim, storage) * 1_000_000 / 2 ** 20
+        print(f"  {vector_dtype:<8} {index_params['index_type']:<8} {megabytes:8.0f} MB per million vectors  "
+              f"recall@{top_k}={result[f'recall@{top_k}']:.3f} p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+    connections.disconnect("default")